@@ -0,0 +1,17 @@
+"""Offline benchmarks for the calculator and the agent tools.
+
+    python -m benchmarks run [--filter TEXT] [--save FILE]
+    python -m benchmarks compare BASELINE CURRENT [--threshold PERCENT]
+    python -m benchmarks simulate [--sessions N] [--latency SECONDS]
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CALCULATOR_DIR = os.path.join(ROOT, "calculator")
+
+# The calculator is imported the way calculator/main.py does it: "from pkg.calculator import ...".
+for path in (ROOT, CALCULATOR_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,115 @@
+import argparse
+import json
+import platform
+import sys
+import time
+
+from . import cases  # noqa: F401  (registers the benchmarks)
+from . import simulate
+from .fixtures import Fixtures
+from .harness import BENCHMARKS, measure
+
+DEFAULT_THRESHOLD = 10.0
+
+
+def run(args):
+    names = [name for name in BENCHMARKS if not args.filter or args.filter in name]
+    if not names:
+        print(f"No benchmarks match {args.filter!r}")
+        return 1
+
+    results = {}
+    with Fixtures() as fixtures:
+        for name in names:
+            spec = BENCHMARKS[name]
+            func = spec["setup"](fixtures)
+            number = max(1, int(spec["number"] * args.scale))
+            stats = measure(func, number, spec["repeat"], count_blocks=spec["count_blocks"])
+            results[name] = stats
+            print(
+                f"{name:36} median {_fmt_time(stats['median']):>10}  p95 {_fmt_time(stats['p95']):>10}  "
+                f"{stats['ops_per_sec']:>12,.1f} ops/s  peak {stats['peak_memory'] / 1024:>9,.1f} KiB"
+                + (f"  blocks {stats['blocks']:>8,}" if stats["blocks"] is not None else "")
+            )
+
+    if args.save:
+        report = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"Saved results to {args.save}")
+    return 0
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    with open(args.current) as f:
+        current = json.load(f)["results"]
+
+    regressions = 0
+    for name in sorted(set(baseline) & set(current)):
+        before = baseline[name]["median"]
+        after = current[name]["median"]
+        change = (after - before) / before * 100 if before else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -args.threshold:
+            flag = "  faster"
+        print(f"{name:36} {_fmt_time(before):>10} -> {_fmt_time(after):>10}  {change:+7.1f}%{flag}")
+
+    for name in sorted(set(baseline) ^ set(current)):
+        print(f"{name:36} only in {'baseline' if name in baseline else 'current'}")
+
+    if regressions:
+        print(f"{regressions} benchmark(s) slower than baseline by more than {args.threshold}%")
+        return 1
+    return 0
+
+
+def _fmt_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--filter", help="only run benchmarks whose name contains this text")
+    run_parser.add_argument("--save", help="write the results as a JSON baseline")
+    run_parser.add_argument("--scale", type=float, default=1.0, help="multiply the calls per round (0.1 for a quick run)")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="compare two saved results")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="percent slowdown of the median that counts as a regression")
+    compare_parser.set_defaults(func=compare)
+
+    simulate_parser = commands.add_parser("simulate", help="load-test the agent loop against a scripted fake model")
+    simulate_parser.add_argument("--sessions", type=int, default=8, help="sessions to run in total")
+    simulate_parser.add_argument("--concurrency", type=int, help="sessions running at the same time (default: all)")
+    simulate_parser.add_argument("--latency", type=float, default=0.2, help="mean fake model latency in seconds")
+    simulate_parser.add_argument("--jitter", type=float, default=0.5, help="latency spread as a fraction of --latency")
+    simulate_parser.add_argument("--failure-rate", type=float, default=0.0, help="share of model calls failing with a retryable 503")
+    simulate_parser.add_argument("--seed", type=int, default=0)
+    simulate_parser.add_argument("--script", help="JSON list of steps to play instead of the built-in one")
+    simulate_parser.add_argument("--save", help="write the report as JSON")
+    simulate_parser.set_defaults(func=simulate.main)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,345 @@
+import os
+import subprocess
+import sys
+
+from . import ROOT
+from .fixtures import use_db_file
+from .harness import benchmark
+
+# ------------------------------
+# Calculator
+# ------------------------------
+
+
+@benchmark("calculator.evaluate")
+def calculator_evaluate(fixtures):
+    from pkg.calculator import Calculator
+
+    calculator = Calculator()
+    corpus = fixtures.expressions(100)
+
+    def run():
+        for expression in corpus:
+            calculator.evaluate(expression)
+
+    return run
+
+
+@benchmark("calculator.evaluate_uncached", number=100)
+def calculator_evaluate_uncached(fixtures):
+    from pkg.calculator import Calculator
+    from pkg.expression import compile_expression
+
+    calculator = Calculator()
+    corpus = fixtures.expressions(100)
+
+    def run():
+        compile_expression.cache_clear()
+        for expression in corpus:
+            calculator.evaluate(expression)
+
+    return run
+
+
+@benchmark("calculator.evaluate_batch", number=20)
+def calculator_evaluate_batch(fixtures):
+    from array import array
+
+    from pkg.calculator import Calculator
+
+    calculator = Calculator()
+    numbers = fixtures.numbers(100_000)
+    columns = {"a": array("d", numbers), "b": array("d", reversed(numbers))}
+
+    return lambda: calculator.evaluate_batch("a * b + a / 3", columns)
+
+
+@benchmark("render.format_json_output", number=10_000)
+def render_format_json_output(fixtures):
+    from pkg.render import format_json_output
+
+    return lambda: format_json_output("2 * 3 - 8 / 2 + 5", 7.0)
+
+
+@benchmark("very_fancy_sum.list", number=20)
+def very_fancy_sum_list(fixtures):
+    from pkg.very_fancy_sum import very_fancy_sum
+
+    numbers = fixtures.numbers(100_000)
+    return lambda: very_fancy_sum(numbers)
+
+
+@benchmark("very_fancy_sum.pipeline", number=20)
+def very_fancy_sum_pipeline(fixtures):
+    from pkg.very_fancy_sum import very_fancy_sum
+
+    numbers = fixtures.numbers(200)
+    # The warmup call fills heavyish_transform's memo, so this times the pipeline itself.
+    return lambda: very_fancy_sum(numbers, use_fast_path=False)
+
+
+def _cpu_bound_transform(n):
+    # Pure-Python arithmetic that holds the GIL the whole time (heavyish_transform only
+    # sleeps, which threads overlap as well as processes). Module level so it pickles.
+    x = n
+    for _ in range(5_000):
+        x = (x * 1.000001 + 1.0) % 1e6
+    return n
+
+
+def _cpu_bound_mode(workers, use_processes):
+    def setup(fixtures):
+        from pkg.very_fancy_sum import very_fancy_sum
+
+        numbers = fixtures.numbers(400)
+        return lambda: very_fancy_sum(
+            numbers,
+            use_processes=use_processes,
+            use_fast_path=False,
+            parallel_workers=workers,
+            chunk_size=50,
+            transform=_cpu_bound_transform,
+        )
+
+    return setup
+
+
+# The same CPU-bound work on threads and on processes: threads stay at one core's
+# speed because of the GIL, processes should scale with the number of cores.
+benchmark("very_fancy_sum.threads_all_cores", number=1, repeat=3)(_cpu_bound_mode(os.cpu_count(), False))
+benchmark("very_fancy_sum.processes_1", number=1, repeat=3)(_cpu_bound_mode(1, True))
+benchmark("very_fancy_sum.processes_all_cores", number=1, repeat=3)(_cpu_bound_mode(os.cpu_count(), True))
+
+
+# ------------------------------
+# BaseSummand
+# ------------------------------
+
+
+def _legacy_summand():
+    # BaseSummand as it was before __slots__: a dataclass whose every value read
+    # goes through a property and NumericDescriptor.__get__. Kept here to compare.
+    from dataclasses import dataclass
+
+    from pkg.very_fancy_sum import NumericDescriptor
+
+    @dataclass
+    class LegacySummand:
+        value: float
+        value_descr = NumericDescriptor("_value_internal")
+
+        def __post_init__(self):
+            type(self).value_descr.__set__(self, self.value)
+
+        @property
+        def value(self) -> float:
+            return type(self).value_descr.__get__(self, LegacySummand)
+
+        @value.setter
+        def value(self, v: float):
+            type(self).value_descr.__set__(self, v)
+
+        def __add__(self, other):
+            if isinstance(other, LegacySummand):
+                return LegacySummand(self.value + other.value)
+            elif isinstance(other, (int, float)):
+                return LegacySummand(self.value + other)
+            return NotImplemented
+
+        def __iadd__(self, other):
+            if isinstance(other, LegacySummand):
+                self.value += other.value
+            elif isinstance(other, (int, float)):
+                self.value += other
+            else:
+                return NotImplemented
+            return self
+
+    return LegacySummand
+
+
+def _summand_class(kind):
+    if kind == "legacy":
+        return _legacy_summand()
+    from pkg.very_fancy_sum import BaseSummand
+
+    return BaseSummand
+
+
+def _summand_construct(kind):
+    def setup(fixtures):
+        cls = _summand_class(kind)
+        numbers = fixtures.numbers(10_000)
+        # Returns the objects, so the blocks column shows what 10,000 of them hold on to.
+        return lambda: [cls(x) for x in numbers]
+
+    return setup
+
+
+def _summand_add(kind):
+    def setup(fixtures):
+        cls = _summand_class(kind)
+        items = [cls(x) for x in fixtures.numbers(10_000)]
+
+        def run():
+            total = cls(0.0)
+            for item in items:
+                total = total + item
+            return total
+
+        return run
+
+    return setup
+
+
+def _summand_accumulate(kind):
+    def setup(fixtures):
+        numbers = fixtures.numbers(10_000)
+        if kind == "legacy":
+            cls = _summand_class(kind)
+
+            # The old Aggregator body: acc += item through the property.
+            def run():
+                acc = cls(0.0)
+                for x in numbers:
+                    acc += x
+                return acc.value
+
+            return run
+
+        from pkg.very_fancy_sum import Aggregator
+
+        def run():
+            aggregate = Aggregator()
+            for x in numbers:
+                aggregate(x)
+            return aggregate.result()
+
+        return run
+
+    return setup
+
+
+for _kind in ("legacy", "slots"):
+    benchmark(f"summand.construct_{_kind}", number=20, count_blocks=True)(_summand_construct(_kind))
+    benchmark(f"summand.add_{_kind}", number=20)(_summand_add(_kind))
+    benchmark(f"summand.accumulate_{_kind}", number=20)(_summand_accumulate(_kind))
+
+
+# ------------------------------
+# Agent tools
+# ------------------------------
+
+
+@benchmark("tools.get_files_info", number=200)
+def tools_get_files_info(fixtures):
+    from functions.get_files_info import get_files_info
+
+    tree = fixtures.directory_tree()
+    return lambda: get_files_info(tree, "dir_0")
+
+
+@benchmark("tools.get_file_content", number=200)
+def tools_get_file_content(fixtures):
+    from functions.get_file_content import get_file_content
+
+    path = fixtures.large_file()
+    return lambda: get_file_content(os.path.dirname(path), os.path.basename(path))
+
+
+@benchmark("tools.read_listing_serial", number=20)
+def tools_read_listing_serial(fixtures):
+    from functions.get_file_content import get_file_content
+
+    tree = fixtures.directory_tree()
+    paths = [os.path.join("dir_0", f"file_{i}.py") for i in range(20)]
+
+    def run():
+        for path in paths:
+            get_file_content(tree, path)
+
+    return run
+
+
+@benchmark("tools.read_listing_prefetched", number=20)
+def tools_read_listing_prefetched(fixtures):
+    # What the model sees after get_files_info: the same 20 files in one call, out of the session cache.
+    from functions.get_file_content import get_file_content
+    from functions.get_many_file_contents import get_many_file_contents
+    from prefetch import FileCache, Prefetcher
+
+    tree = fixtures.directory_tree()
+    paths = [os.path.join("dir_0", f"file_{i}.py") for i in range(20)]
+    cache = FileCache()
+    prefetcher = Prefetcher(cache, get_file_content)
+    prefetcher.after_listing(tree, "dir_0")
+
+    def read(working_directory, path):
+        return cache.read(working_directory, get_file_content, path)
+
+    return lambda: get_many_file_contents(tree, paths, read_file=read)
+
+
+# ------------------------------
+# Agent startup
+# ------------------------------
+
+
+def _startup(*args):
+    def setup(fixtures):
+        # A fresh interpreter per call with the stub SDK first on the path, so this
+        # measures main.py and our modules rather than google.genai.
+        env = dict(os.environ, PYTHONPATH=fixtures.stub_sdk(), GEMINI_API_KEY="stub")
+        command = [sys.executable, os.path.join(ROOT, "main.py"), *args]
+        return lambda: subprocess.run(command, cwd=fixtures.root, env=env, stdout=subprocess.DEVNULL, check=True)
+
+    return setup
+
+
+# "--help" should only cost the interpreter; "--profile-startup" loads everything a run needs.
+benchmark("startup.help", number=1, repeat=10)(_startup("--help"))
+benchmark("startup.profile", number=1, repeat=10)(_startup("--profile-startup"))
+
+
+# ------------------------------
+# Metrics
+# ------------------------------
+
+
+@benchmark("metrics.histogram_observe", number=100_000)
+def metrics_histogram_observe(fixtures):
+    from metrics import Registry
+
+    histogram = Registry().histogram("bench_seconds")
+    return lambda: histogram.observe(0.0042)
+
+
+# ------------------------------
+# Memory
+# ------------------------------
+
+
+@benchmark("memory.save_message", number=50)
+def memory_save_message(fixtures):
+    import memory
+
+    path = fixtures.memory_db("save.db", rows=0)
+
+    def run():
+        with use_db_file(path):
+            memory.save_message("user", "benchmark message")
+
+    return run
+
+
+@benchmark("memory.load_messages", number=5)
+def memory_load_messages(fixtures):
+    import memory
+
+    path = fixtures.memory_db()
+
+    def run():
+        with use_db_file(path):
+            memory.load_messages()
+
+    return run
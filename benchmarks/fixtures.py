@@ -0,0 +1,147 @@
+import os
+import random
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+SEED = 1234
+
+# Stand-in for google.genai, see Fixtures.stub_sdk.
+_STUB_GENAI = '''
+class _StubType(type):
+    def __getattr__(cls, name):
+        return cls
+
+
+class _Stub(metaclass=_StubType):
+    """Accepts any arguments and attribute access; stands in for every SDK class."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        return _Stub()
+
+    def __call__(self, *args, **kwargs):
+        return _Stub()
+
+
+Client = _Stub
+'''
+
+_STUB_TYPES = '''
+from google.genai import _Stub
+
+
+def __getattr__(name):
+    return _Stub
+'''
+
+
+class Fixtures:
+    """
+    Reproducible synthetic inputs. Everything is generated from SEED into a
+    temporary directory, so runs on different machines time the same data.
+    """
+
+    def __init__(self, seed=SEED):
+        self.seed = seed
+        self.root = tempfile.mkdtemp(prefix="agentic-bench-")
+
+    def close(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def rng(self):
+        return random.Random(self.seed)
+
+    def expressions(self, count=1000):
+        rng = self.rng()
+        corpus = []
+        for _ in range(count):
+            terms = [str(rng.randint(1, 999)) for _ in range(rng.randint(2, 8))]
+            expression = terms[0]
+            for term in terms[1:]:
+                expression += f" {rng.choice('+-*/')} {term}"
+            corpus.append(expression)
+        return corpus
+
+    def numbers(self, count=1000):
+        rng = self.rng()
+        return [round(rng.uniform(-1000, 1000), 3) for _ in range(count)]
+
+    def directory_tree(self, name="tree", depth=3, width=4, files_per_dir=20):
+        """A tree of width**depth folders with small files of random size."""
+        base = os.path.join(self.root, name)
+        if os.path.isdir(base):
+            return base
+        rng = self.rng()
+
+        def build(path, level):
+            os.makedirs(path)
+            for i in range(files_per_dir):
+                with open(os.path.join(path, f"file_{i}.py"), "w") as f:
+                    f.write("x = 1\n" * rng.randint(1, 200))
+            if level < depth:
+                for i in range(width):
+                    build(os.path.join(path, f"dir_{i}"), level + 1)
+
+        build(base, 1)
+        return base
+
+    def large_file(self, name="large.txt", size=5_000_000):
+        path = os.path.join(self.root, name)
+        if not os.path.exists(path):
+            rng = self.rng()
+            line = "".join(rng.choice("abcdefghij ") for _ in range(99)) + "\n"
+            with open(path, "w") as f:
+                f.write(line * (size // len(line)))
+        return path
+
+    def memory_db(self, name="memory.db", rows=5000):
+        """A memory.db with `rows` messages, built with memory.py itself."""
+        import memory
+
+        path = os.path.join(self.root, name)
+        if not os.path.exists(path):
+            rng = self.rng()
+            with use_db_file(path):
+                memory.init_db()
+                for i in range(rows):
+                    memory.save_message(rng.choice(["user", "model", "tool"]), f"message {i} " + "lorem " * rng.randint(1, 50))
+        return path
+
+    def stub_sdk(self):
+        """
+        A do-nothing google.genai package; returns the directory to put first on
+        PYTHONPATH. Startup benchmarks use it to time our own imports without the
+        SDK's, which dominate and change with every SDK release.
+        """
+        path = os.path.join(self.root, "stub_sdk")
+        package = os.path.join(path, "google", "genai")
+        if not os.path.isdir(package):
+            os.makedirs(package)
+            with open(os.path.join(package, "__init__.py"), "w") as f:
+                f.write(_STUB_GENAI)
+            with open(os.path.join(package, "types.py"), "w") as f:
+                f.write(_STUB_TYPES)
+        return path
+
+
+@contextmanager
+def use_db_file(path):
+    """Point memory.py at another database file for the duration of a block."""
+    import memory
+
+    previous = memory.DB_FILE
+    memory.DB_FILE = path
+    try:
+        yield path
+    finally:
+        memory.DB_FILE = previous
+
@@ -0,0 +1,73 @@
+import gc
+import statistics
+import sys
+import time
+import tracemalloc
+
+BENCHMARKS = {}
+
+
+def benchmark(name, number=1000, repeat=15, count_blocks=False):
+    """
+    Register a benchmark. The decorated function does the setup and returns the
+    zero-argument callable to time; it gets the fixtures object from fixtures.py.
+    count_blocks also reports how many memory blocks the callable's result holds.
+    """
+
+    def register(setup):
+        BENCHMARKS[name] = {"setup": setup, "number": number, "repeat": repeat, "count_blocks": count_blocks}
+        return setup
+
+    return register
+
+
+def measure(func, number, repeat, warmup=1, count_blocks=False):
+    """
+    Time func in `repeat` rounds of `number` calls and return per-call statistics.
+    The garbage collector is off while a round runs so collections do not land
+    in random rounds. Peak memory is measured in a separate call under tracemalloc,
+    because tracing slows every allocation down. With count_blocks, `blocks` is the
+    number of interpreter memory blocks held by what one call returns.
+    """
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(number):
+                func()
+            samples.append((time.perf_counter() - started) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    blocks = None
+    if count_blocks:
+        before = sys.getallocatedblocks()
+        result = func()
+        blocks = sys.getallocatedblocks() - before
+        del result
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    samples.sort()
+    median = statistics.median(samples)
+    return {
+        "median": median,
+        "p95": samples[min(len(samples) - 1, round(0.95 * (len(samples) - 1)))],
+        "min": samples[0],
+        "ops_per_sec": 1 / median if median else float("inf"),
+        "peak_memory": peak,
+        "blocks": blocks,
+        "number": number,
+        "repeat": repeat,
+    }
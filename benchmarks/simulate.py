@@ -0,0 +1,334 @@
+"""Load-test the agent loop offline: scripted fake model, real tools, real memory.db.
+
+    python -m benchmarks simulate [--sessions N] [--concurrency N] [--latency S] [--script FILE]
+
+Every session runs main.generate_content against a fake client that plays a
+script of function calls and a final answer, with synthetic latency and token
+counts. Tool calls run for real against a generated project and every turn is
+written to one shared memory.db, so the report shows where the loop stops
+scaling: model wait, tools, or SQLite writes.
+"""
+
+import io
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import ROOT
+from .fixtures import use_db_file
+
+# Explore a folder, read a few files, run one, write a note, answer.
+# String arguments may contain {session}; steps without "calls" end the session.
+DEFAULT_SCRIPT = [
+    {"calls": [{"name": "get_files_info", "args": {"directory": "."}}]},
+    {"calls": [{"name": "get_files_info", "args": {"directory": "dir_0"}}]},
+    {
+        "calls": [
+            {"name": "get_many_file_contents", "args": {"file_paths": ["dir_0/file_0.py", "dir_0/file_1.py", "dir_0/file_2.py"]}},
+        ],
+    },
+    {"calls": [{"name": "get_file_content", "args": {"file_path": "dir_0/file_3.py"}}]},
+    {"calls": [{"name": "run_python_file", "args": {"file_path": "dir_0/file_0.py"}}]},
+    {"calls": [{"name": "write_file", "args": {"file_path": "notes/session_{session}.md", "content": "Looked at dir_0.\n"}}]},
+    {"text": "dir_0 holds small Python files; file_0.py runs cleanly.", "tokens": 40},
+]
+
+# Synthetic prompt size: a fixed system part plus a share per message in the history.
+PROMPT_TOKENS_BASE = 300
+PROMPT_TOKENS_PER_MESSAGE = 150
+DEFAULT_RESPONSE_TOKENS = 30
+
+
+class SimulatedError(Exception):
+    """A transient API failure; `code` makes resilience.classify_error retry it."""
+
+    def __init__(self, code=503):
+        super().__init__(f"{code} simulated model failure")
+        self.code = code
+
+
+class Samples:
+    """
+    Raw durations per phase. Percentiles are exact (nearest rank over every sample),
+    unlike metrics.Histogram's estimates inside its fixed buckets.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def add(self, phase, seconds):
+        with self._lock:
+            self._data.setdefault(phase, []).append(seconds)
+
+    def timed(self, phase, func):
+        """Wrap func so every call's duration is added under phase (a string or a function of the call's arguments)."""
+
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(phase if isinstance(phase, str) else phase(*args, **kwargs), time.perf_counter() - started)
+
+        return wrapper
+
+    def count(self, phase):
+        with self._lock:
+            return len(self._data.get(phase, ()))
+
+    def summary(self):
+        with self._lock:
+            data = {phase: sorted(values) for phase, values in self._data.items()}
+        return {
+            phase: {
+                "count": len(values),
+                "p50": percentile(values, 0.5),
+                "p95": percentile(values, 0.95),
+                "p99": percentile(values, 0.99),
+                "max": values[-1],
+            }
+            for phase, values in sorted(data.items())
+        }
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank q-quantile (0..1) of an already sorted list; always one of the samples."""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+
+class ScriptedModels:
+    """Stands in for client.models. The step to play is the number of model turns already in contents."""
+
+    def __init__(self, script, session, latency=0.2, jitter=0.5, failure_rate=0.0, seed=0, samples=None):
+        self.script = script
+        self.session = session
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.samples = samples
+
+    def generate_content(self, model, contents, config=None):
+        started = time.perf_counter()
+        spread = self.latency * self.jitter
+        time.sleep(max(0.0, self.latency + self.rng.uniform(-spread, spread)))
+        if self.rng.random() < self.failure_rate:
+            if self.samples is not None:
+                self.samples.add("model call (failed)", time.perf_counter() - started)
+            raise SimulatedError()
+        turn = sum(1 for content in contents if content.role == "model")
+        step = self.script[min(turn, len(self.script) - 1)]
+        response = _response(step, self.session, len(contents))
+        if self.samples is not None:
+            self.samples.add("model call", time.perf_counter() - started)
+        return response
+
+
+class ScriptedClient:
+    def __init__(self, models):
+        self.models = models
+
+
+def _response(step, session, history_length):
+    from google.genai import types
+
+    parts = []
+    if step.get("text"):
+        parts.append(types.Part(text=step["text"]))
+    for call in step.get("calls", []):
+        parts.append(types.Part(function_call=types.FunctionCall(name=call["name"], args=_fill_session(call.get("args", {}), session))))
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=parts))],
+        usage_metadata=types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=PROMPT_TOKENS_BASE + PROMPT_TOKENS_PER_MESSAGE * history_length,
+            candidates_token_count=step.get("tokens", DEFAULT_RESPONSE_TOKENS),
+        ),
+    )
+
+
+def _fill_session(value, session):
+    if isinstance(value, str):
+        return value.replace("{session}", str(session))
+    if isinstance(value, list):
+        return [_fill_session(item, session) for item in value]
+    if isinstance(value, dict):
+        return {key: _fill_session(item, session) for key, item in value.items()}
+    return value
+
+
+class _ThreadOutput(io.TextIOBase):
+    """stdout replacement that keeps what each thread prints apart, so every session's log can be checked."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is not None:
+            buffer.append(text)
+        return len(text)
+
+    def capture(self):
+        self._local.buffer = []
+        return self._local.buffer
+
+
+def simulate(
+    project,
+    db_path,
+    sessions=8,
+    concurrency=None,
+    script=DEFAULT_SCRIPT,
+    latency=0.2,
+    jitter=0.5,
+    failure_rate=0.0,
+    seed=0,
+):
+    """
+    Run `sessions` scripted sessions, `concurrency` at a time, against the files in
+    project and the database at db_path. Returns the report dict.
+    """
+    from google.genai import types
+
+    import call_functions
+    import memory
+    from metrics import REGISTRY
+
+    generate_content = _agent_main().generate_content
+    concurrency = concurrency or sessions
+    samples = Samples()
+    config = types.GenerateContentConfig(tools=[types.Tool(function_declarations=call_functions.tool_schemas())])
+    output = _ThreadOutput()
+
+    def run_session(session):
+        log = output.capture()
+        client = ScriptedClient(ScriptedModels(script, session, latency, jitter, failure_rate, seed + session, samples))
+        prompt = f"Session {session}: look around the project."
+        started = time.perf_counter()
+        messages = [types.Content(role="user", parts=[types.Part(text=prompt)])]
+        try:
+            memory.save_message("user", prompt)
+            generate_content(client, messages, config, verbose=False)
+        except Exception as e:
+            log.append(f"Error during generation: {e}\n")
+        samples.add("session", time.perf_counter() - started)
+        text = "".join(log)
+        errors = [line for line in text.splitlines() if line.startswith("Error during generation")]
+        return "Final response:" in text and not errors, errors
+
+    # generate_content looks both up at call time, so the timed wrappers are what it runs.
+    previous_call_function = call_functions.call_function
+    previous_save_message = memory.save_message
+    previous_directory = call_functions.working_directory
+    previous_stdout = sys.stdout
+    call_functions.call_function = samples.timed(lambda part, *args, **kwargs: f"tool {part.name}", previous_call_function)
+    memory.save_message = samples.timed("memory write", previous_save_message)
+    call_functions.working_directory = project
+    lock_errors_before = _counter(REGISTRY, "agent_memory_lock_errors_total")
+    with use_db_file(db_path):
+        memory.init_db()
+        sys.stdout = output
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="session") as executor:
+                results = list(executor.map(run_session, range(sessions)))
+        finally:
+            wall = time.perf_counter() - started
+            sys.stdout = previous_stdout
+            call_functions.working_directory = previous_directory
+            call_functions.call_function = previous_call_function
+            memory.save_message = previous_save_message
+
+    lock_errors = _counter(REGISTRY, "agent_memory_lock_errors_total") - lock_errors_before
+    return _report(samples, lock_errors, results, wall, sessions, concurrency)
+
+
+def _agent_main():
+    # calculator/main.py is also on sys.path as "main", so the agent's is loaded by path.
+    import importlib.util
+
+    spec = importlib.util.spec_from_file_location("agent_main", os.path.join(ROOT, "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _report(samples, lock_errors, results, wall, sessions, concurrency):
+    errors = [error for _, session_errors in results for error in session_errors]
+    return {
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "completed": sum(1 for completed, _ in results if completed),
+        "wall_seconds": wall,
+        "sessions_per_sec": sessions / wall,
+        "model_calls_per_sec": samples.count("model call") / wall,
+        "phases": samples.summary(),
+        "sqlite_lock_errors": lock_errors,
+        "errors": errors[:10],
+    }
+
+
+def _counter(registry, name):
+    return sum(metric.value for metric in registry.metrics() if metric.name == name)
+
+
+def print_report(report):
+    print(
+        f"{report['completed']}/{report['sessions']} sessions completed, {report['concurrency']} at a time, "
+        f"in {report['wall_seconds']:.2f}s: {report['sessions_per_sec']:.2f} sessions/s, "
+        f"{report['model_calls_per_sec']:.1f} model calls/s"
+    )
+    print(f"{'phase':30} {'count':>7} {'p50':>10} {'p95':>10} {'p99':>10} {'max':>10}")
+    for name, phase in report["phases"].items():
+        print(
+            f"{name:30} {phase['count']:>7} "
+            + " ".join(f"{_ms(phase[q]):>10}" for q in ("p50", "p95", "p99", "max"))
+        )
+    print(f"SQLite lock errors: {report['sqlite_lock_errors']:.0f}")
+    for error in report["errors"]:
+        print(f"  {error}")
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.2f}ms"
+
+
+def load_script(path):
+    with open(path) as f:
+        script = json.load(f)
+    if not script or not isinstance(script, list) or "calls" in script[-1]:
+        raise ValueError(f"{path}: a script is a JSON list of steps whose last step has no \"calls\"")
+    return script
+
+
+def main(args):
+    from .fixtures import Fixtures
+
+    script = load_script(args.script) if args.script else DEFAULT_SCRIPT
+    with Fixtures() as fixtures:
+        project = fixtures.directory_tree()
+        report = simulate(
+            project,
+            os.path.join(fixtures.root, "simulate.db"),
+            sessions=args.sessions,
+            concurrency=args.concurrency,
+            script=script,
+            latency=args.latency,
+            jitter=args.jitter,
+            failure_rate=args.failure_rate,
+            seed=args.seed,
+        )
+    print_report(report)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"Saved report to {args.save}")
+    return 0 if report["completed"] == report["sessions"] else 1
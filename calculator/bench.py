@@ -0,0 +1,76 @@
+# bench.py
+
+import random
+import sys
+import time
+import timeit
+from array import array
+
+from pkg.calculator import Calculator
+from pkg.expression import compile_expression
+
+EXPRESSIONS = [
+    "3 + 5",
+    "2 * 3 - 8 / 2 + 5",
+    "1 + 2 * 3 - 4 / 5 + 6 * 7 - 8 / 9 + 10",
+]
+
+
+def bench_compiled(number):
+    calculator = Calculator()
+    print("Compiled engine vs _evaluate_infix (evaluations per second)")
+    for expression in EXPRESSIONS:
+        legacy = timeit.timeit(
+            lambda: calculator._evaluate_infix(expression.strip().split()), number=number
+        )
+        compile_expression.cache_clear()
+        cold = timeit.timeit(
+            lambda: (compile_expression.cache_clear(), calculator.evaluate(expression)), number=number
+        )
+        cached = timeit.timeit(lambda: calculator.evaluate(expression), number=number)
+        print(f"  {expression!r}")
+        print(f"    _evaluate_infix : {number / legacy:12,.0f}/s")
+        print(f"    compile + run   : {number / cold:12,.0f}/s")
+        print(f"    cached program  : {number / cached:12,.0f}/s  ({legacy / cached:.1f}x)")
+
+
+def bench_batch(number):
+    calculator = Calculator()
+    expression = "a * b + c / (a + 1)"
+    rows = number * 10
+    rng = random.Random(0)
+    columns = {name: array("d", (rng.random() for _ in range(rows))) for name in "abc"}
+    a, b, c = columns["a"], columns["b"], columns["c"]
+
+    started = time.perf_counter()
+    for i in range(rows):
+        calculator.evaluate(expression, {"a": a[i], "b": b[i], "c": c[i]})
+    per_row = rows / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    calculator.evaluate_batch(expression, columns)
+    batch = rows / (time.perf_counter() - started)
+
+    print(f"Batch evaluation of {expression!r} over {rows:,} rows (rows per second)")
+    print(f"  evaluate per row : {per_row:14,.0f}/s")
+    print(f"  evaluate_batch   : {batch:14,.0f}/s  ({batch / per_row:.1f}x)")
+
+
+BENCHMARKS = {
+    "compiled": bench_compiled,
+    "batch": bench_batch,
+}
+
+
+def main():
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark: {name}. Available: {', '.join(BENCHMARKS)}")
+            return
+    for name in names:
+        BENCHMARKS[name](number=100_000)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@
 import sys
 from pkg.calculator import Calculator
 from pkg.render import format_json_output
+from pkg.stream import report, stream
 
 
 def main():
@@ -10,7 +11,13 @@ def main():
     if len(sys.argv) <= 1:
         print("Calculator App")
         print('Usage: python main.py "<expression>"')
+        print("       python main.py --stream [FILE] [--workers N]")
         print('Example: python main.py "3 + 5"')
+        print("Example: python main.py --stream expressions.txt > results.ndjson")
+        return
+
+    if sys.argv[1] == "--stream":
+        main_stream(sys.argv[2:])
         return
 
     expression = " ".join(sys.argv[1:])
@@ -25,5 +32,31 @@ def main():
         print(f"Error: {e}")
 
 
+def main_stream(args):
+    # Reads one expression per line from FILE (or stdin) and writes NDJSON to stdout.
+    workers = 1
+    if "--workers" in args:
+        index = args.index("--workers")
+        try:
+            workers = int(args[index + 1])
+        except (IndexError, ValueError):
+            print("Error: --workers needs a number")
+            return
+        del args[index:index + 2]
+
+    # 1 MiB output buffer: records are written in chunks, not one syscall per line.
+    out = open(sys.stdout.fileno(), "w", buffering=1 << 20, closefd=False)
+    try:
+        if args:
+            with open(args[0]) as f:
+                counts = stream(f, out, workers)
+        else:
+            counts = stream(sys.stdin, out, workers)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return
+    report(*counts)
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,5 +1,18 @@
 # calculator.py
 
+from array import array
+
+from .expression import compile_expression, run, run_vectorized, to_function, variables_of
+
+try:
+    import numpy as np
+except ImportError:  # batch evaluation falls back to array('d') buffers
+    np = None
+
+# Rows evaluated per NumPy step; bounds the temporaries an expression allocates.
+BATCH_CHUNK_SIZE = 65536
+
+
 class Calculator:
     def __init__(self):
         self.operators = {
@@ -15,11 +28,51 @@ class Calculator:
             "/": 2,
         }
 
-    def evaluate(self, expression):
+    def evaluate(self, expression, variables=None):
         if not expression or expression.isspace():
             return None
-        tokens = expression.strip().split()
-        return self._evaluate_infix(tokens)
+        return run(compile_expression(expression), variables)
+
+    def evaluate_batch(self, expression, columns, chunk_size=BATCH_CHUNK_SIZE):
+        """Evaluate one expression for every row of the given columns.
+
+        columns maps variable names to equally long sequences of numbers (NumPy
+        arrays, array('d') buffers, lists). Returns a float64 NumPy array when NumPy
+        is installed, otherwise an array('d'). Row i gives the same result as
+        evaluate(expression, {name: column[i] for each column}).
+        """
+        if not expression or expression.isspace():
+            return None
+        program = compile_expression(expression)
+        names = variables_of(program)
+
+        missing = [name for name in names if name not in columns]
+        if missing:
+            raise ValueError(f"unknown variable: {missing[0]}")
+        lengths = {len(column) for column in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("columns must all have the same length")
+        if not lengths:
+            raise ValueError("evaluate_batch needs at least one column")
+        rows = lengths.pop()
+
+        if np is None:
+            return self._evaluate_batch_python(program, names, columns, rows)
+
+        arrays = {name: np.asarray(columns[name], dtype=np.float64) for name in names}
+        result = np.empty(rows, dtype=np.float64)
+        for start in range(0, rows, chunk_size):
+            stop = min(start + chunk_size, rows)
+            chunk = {name: values[start:stop] for name, values in arrays.items()}
+            # A constant expression gives a float, broadcast over the chunk.
+            result[start:stop] = run_vectorized(program, chunk)
+        return result
+
+    def _evaluate_batch_python(self, program, names, columns, rows):
+        function = to_function(program)
+        if not names:
+            return array("d", [function()]) * rows
+        return array("d", map(function, *(map(float, columns[name]) for name in names)))
 
     def _evaluate_infix(self, tokens):
         values = []
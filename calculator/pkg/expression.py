@@ -0,0 +1,232 @@
+# expression.py
+
+import math
+import operator
+import re
+from functools import lru_cache
+
+# Opcodes of a compiled program. A program is a tuple of (opcode, argument) pairs in
+# postfix order, e.g. "3 + 5 * 2" -> (PUSH 3.0) (PUSH 5.0) (PUSH 2.0) (BINARY mul) (BINARY add).
+# BINARY carries the operator function itself so running a program needs no lookups.
+PUSH = 0
+BINARY = 1
+NEGATE = 2
+LOAD = 3
+
+BINARY_OPERATORS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+}
+
+OPERATOR_SYMBOLS = {func: symbol for symbol, func in BINARY_OPERATORS.items()}
+
+PRECEDENCE = {
+    "+": 1,
+    "-": 1,
+    "*": 2,
+    "/": 2,
+}
+
+# Unary minus binds tighter than any binary operator: "2 * -3" and "-2 * 3" are both -6.
+UNARY_PRECEDENCE = 3
+
+CACHE_SIZE = 1024
+
+_TOKEN_RE = re.compile(
+    r"\s*(?:"
+    r"(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)"
+    r"|(?P<name>[A-Za-z_]\w*)"
+    r"|(?P<op>[-+*/()])"
+    r"|(?P<invalid>\S+?)(?=[\s\w.()+\-*/]|$)"
+    r")"
+)
+
+
+class Variable(str):
+    """A variable name token, kept apart from operator tokens."""
+
+
+def tokenize(expression):
+    """Split an expression into number, variable and operator tokens; whitespace is optional.
+
+    Numbers come back as floats, variables as Variable and operators as strings.
+    """
+    tokens = []
+    # Every non-space character is matched by one of the groups, so findall leaves no gaps.
+    for number, name, op, invalid in _TOKEN_RE.findall(expression):
+        if number:
+            tokens.append(float(number))
+        elif op:
+            tokens.append(op)
+        elif name:
+            tokens.append(Variable(name))
+        else:
+            raise ValueError(f"invalid token: {invalid}")
+    return tokens
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_expression(expression):
+    """Compile an expression to a postfix program, cached on the expression text."""
+    return _compile(tokenize(expression))
+
+
+def _compile(tokens):
+    program = []
+    operators = []
+    # True when the next token has to be an operand, which is what makes "-" unary.
+    expect_operand = True
+
+    for token in tokens:
+        if isinstance(token, float):
+            program.append((PUSH, token))
+            expect_operand = False
+        elif isinstance(token, Variable):
+            program.append((LOAD, str(token)))
+            expect_operand = False
+        elif token == "(":
+            operators.append(token)
+            expect_operand = True
+        elif token == ")":
+            while operators and operators[-1] != "(":
+                _emit(operators.pop(), program)
+            if not operators:
+                raise ValueError("mismatched parentheses")
+            operators.pop()
+            expect_operand = False
+        elif token == "-" and expect_operand:
+            operators.append("neg")
+        else:
+            while (
+                operators
+                and operators[-1] != "("
+                and _precedence(operators[-1]) >= PRECEDENCE[token]
+            ):
+                _emit(operators.pop(), program)
+            operators.append(token)
+            expect_operand = True
+
+    while operators:
+        top = operators.pop()
+        if top == "(":
+            raise ValueError("mismatched parentheses")
+        _emit(top, program)
+
+    _check_stack(program)
+    return tuple(program)
+
+
+def _precedence(op):
+    return UNARY_PRECEDENCE if op == "neg" else PRECEDENCE[op]
+
+
+def _emit(op, program):
+    if op == "neg":
+        program.append((NEGATE, None))
+    else:
+        program.append((BINARY, BINARY_OPERATORS[op]))
+
+
+def _check_stack(program):
+    # Run the program on stack depths only, so evaluation never has to check operands.
+    depth = 0
+    for opcode, argument in program:
+        if opcode == PUSH or opcode == LOAD:
+            depth += 1
+        elif opcode == NEGATE:
+            if depth < 1:
+                raise ValueError("not enough operands for operator -")
+        else:
+            if depth < 2:
+                raise ValueError(f"not enough operands for operator {OPERATOR_SYMBOLS[argument]}")
+            depth -= 1
+    if depth != 1:
+        raise ValueError("invalid expression")
+
+
+def variables_of(program):
+    """Names of the variables a program reads, in order of first use."""
+    return tuple(dict.fromkeys(argument for opcode, argument in program if opcode == LOAD))
+
+
+def run(program, variables=None):
+    """Evaluate a compiled program, reading variables from a mapping of name -> number."""
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    for opcode, argument in program:
+        if opcode == PUSH:
+            push(argument)
+        elif opcode == BINARY:
+            b = pop()
+            stack[-1] = argument(stack[-1], b)
+        elif opcode == NEGATE:
+            stack[-1] = -stack[-1]
+        else:
+            push(float(_lookup(variables, argument)))
+    return stack[0]
+
+
+def _lookup(variables, name):
+    try:
+        return variables[name]
+    except (KeyError, TypeError):
+        raise ValueError(f"unknown variable: {name}") from None
+
+
+def run_vectorized(program, columns):
+    """Evaluate a compiled program with whole-array NumPy operations.
+
+    columns maps variable names to equally long float64 arrays. Division by zero
+    raises ZeroDivisionError like the scalar path instead of producing inf/nan.
+    """
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    for opcode, argument in program:
+        if opcode == PUSH:
+            push(argument)
+        elif opcode == BINARY:
+            b = pop()
+            if argument is operator.truediv and not _all_nonzero(b):
+                raise ZeroDivisionError("float division by zero")
+            stack[-1] = argument(stack[-1], b)
+        elif opcode == NEGATE:
+            stack[-1] = -stack[-1]
+        else:
+            push(columns[argument])
+    return stack[0]
+
+
+def _all_nonzero(value):
+    if isinstance(value, float):
+        return value != 0.0
+    return bool(value.all())
+
+
+def to_function(program):
+    """Turn a compiled program into a plain Python function of its variables.
+
+    The function takes the variables positionally, in variables_of(program) order,
+    so map(function, *columns) evaluates a whole batch without an interpreter loop.
+    """
+    names = variables_of(program)
+    parameters = {name: f"_{index}" for index, name in enumerate(names)}
+    stack = []
+    for opcode, argument in program:
+        if opcode == PUSH:
+            stack.append(repr(argument))
+        elif opcode == LOAD:
+            stack.append(parameters[argument])
+        elif opcode == NEGATE:
+            stack.append(f"(-{stack.pop()})")
+        else:
+            b = stack.pop()
+            a = stack.pop()
+            stack.append(f"({a} {OPERATOR_SYMBOLS[argument]} {b})")
+    source = f"lambda {', '.join(parameters.values())}: {stack[0]}"
+    # Every token was validated by the tokenizer, so the source only holds numbers,
+    # parameter names and the four operators. "inf" covers literals like 1e999.
+    return eval(source, {"__builtins__": {}, "inf": math.inf})
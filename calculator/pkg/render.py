@@ -2,15 +2,38 @@
 
 import json
 
+# json.dumps builds a new encoder on every call when separators are given; reuse one.
+# allow_nan=False: Infinity/NaN are not JSON, encode() raises ValueError for them instead.
+_compact_encoder = json.JSONEncoder(separators=(",", ":"), allow_nan=False)
 
-def format_json_output(expression: str, result: float, indent: int = 2) -> str:
-    if isinstance(result, float) and result.is_integer():
-        result_to_dump = int(result)
-    else:
-        result_to_dump = result
 
+def format_json_output(expression: str, result: float, indent: int = 2) -> str:
     output_data = {
         "expression": expression,
-        "result": result_to_dump,
+        "result": _result_to_dump(result),
     }
     return json.dumps(output_data, indent=indent)
+
+
+def format_ndjson_result(line: int, expression: str, result: float) -> str:
+    output_data = {
+        "line": line,
+        "expression": expression,
+        "result": _result_to_dump(result),
+    }
+    return _compact_encoder.encode(output_data)
+
+
+def format_ndjson_error(line: int, expression: str, error: str) -> str:
+    output_data = {
+        "line": line,
+        "expression": expression,
+        "error": error,
+    }
+    return _compact_encoder.encode(output_data)
+
+
+def _result_to_dump(result):
+    if isinstance(result, float) and result.is_integer():
+        return int(result)
+    return result
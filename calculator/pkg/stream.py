@@ -0,0 +1,88 @@
+# stream.py
+
+import itertools
+import sys
+import time
+from multiprocessing import Pool
+
+from .calculator import Calculator
+from .render import format_ndjson_error, format_ndjson_result
+
+# Lines handed to a worker (or written) at a time; one write() per chunk keeps output buffered.
+CHUNK_LINES = 4096
+
+_worker_calculator = None
+
+
+def evaluate_chunk(calculator, numbered_lines):
+    """Evaluate (line number, text) pairs and return the NDJSON output and the error count."""
+    output = []
+    errors = 0
+    for line_number, text in numbered_lines:
+        expression = text.strip()
+        if not expression:
+            continue
+        try:
+            result = calculator.evaluate(expression)
+        except Exception as e:
+            output.append(format_ndjson_error(line_number, expression, str(e)))
+            errors += 1
+        else:
+            try:
+                output.append(format_ndjson_result(line_number, expression, result))
+            except ValueError:
+                output.append(format_ndjson_error(line_number, expression, f"result is not a finite number: {result}"))
+                errors += 1
+    return "".join(line + "\n" for line in output), len(output), errors
+
+
+def _init_worker():
+    global _worker_calculator
+    _worker_calculator = Calculator()
+
+
+def _evaluate_in_worker(numbered_lines):
+    return evaluate_chunk(_worker_calculator, numbered_lines)
+
+
+def _chunks(lines):
+    numbered = enumerate(lines, 1)
+    while chunk := list(itertools.islice(numbered, CHUNK_LINES)):
+        yield chunk
+
+
+def stream(lines, out, workers=1):
+    """Evaluate expressions line by line and write one NDJSON record per expression.
+
+    Errors are written as records with an "error" key and never stop the stream.
+    With workers > 1, chunks are spread across processes; output order is kept.
+    Returns (expressions, errors, seconds).
+    """
+    started = time.perf_counter()
+    expressions = 0
+    errors = 0
+
+    if workers > 1:
+        with Pool(workers, initializer=_init_worker) as pool:
+            for text, count, chunk_errors in pool.imap(_evaluate_in_worker, _chunks(lines)):
+                out.write(text)
+                expressions += count
+                errors += chunk_errors
+    else:
+        calculator = Calculator()
+        for chunk in _chunks(lines):
+            text, count, chunk_errors = evaluate_chunk(calculator, chunk)
+            out.write(text)
+            expressions += count
+            errors += chunk_errors
+
+    out.flush()
+    return expressions, errors, time.perf_counter() - started
+
+
+def report(expressions, errors, seconds):
+    rate = expressions / seconds if seconds else 0.0
+    print(
+        f"Processed {expressions} expressions ({errors} errors) in {seconds:.3f}s: {rate:,.0f} lines/s",
+        file=sys.stderr,
+    )
@@ -1,9 +1,22 @@
 import asyncio
+import io
+import itertools
+import math
+import mmap
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor
-from dataclasses import dataclass
+import types
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from functools import wraps, singledispatch
-from typing import Iterable, Protocol, runtime_checkable, Any
+from pathlib import PurePath
+from typing import Callable, Iterable, Protocol, runtime_checkable, Any
+
+try:
+    import numpy as np
+except ImportError:  # ndarray inputs are simply not accepted without NumPy
+    np = None
 
 
 # ------------------------------
@@ -27,6 +40,8 @@ class NumericDescriptor:
         self.name = name
 
     def __get__(self, instance, owner):
+        if instance is None:
+            return self
         return getattr(instance, self.name)
 
     def __set__(self, instance, value):
@@ -45,23 +60,21 @@ class Summable(Protocol):
 
 
 # ------------------------------
-# Dataclass that represents a number and overloads arithmetic
+# Slotted class that represents a number and overloads arithmetic
 # ------------------------------
-@dataclass
 class BaseSummand(metaclass=RegistryMeta):
-    value: float
-    value_descr = NumericDescriptor("_value_internal")
+    """
+    A number with arithmetic. `value` is a plain slot: reads and in-place updates
+    cost one attribute access and instances carry no __dict__. The descriptor
+    validates once, in __init__; arithmetic only ever stores int/float results.
+    """
 
-    def __post_init__(self):
-        self.value_descr.__set__(self, self.value)
+    __slots__ = ("value",)
+    __match_args__ = ("value",)
+    value_descr = NumericDescriptor("value")
 
-    @property
-    def value(self) -> float:
-        return self.value_descr.__get__(self, BaseSummand)
-
-    @value.setter
-    def value(self, v: float):
-        self.value_descr.__set__(self, v)
+    def __init__(self, value: float):
+        type(self).value_descr.__set__(self, value)
 
     def __add__(self, other):
         if isinstance(other, BaseSummand):
@@ -86,6 +99,14 @@ class BaseSummand(metaclass=RegistryMeta):
             return NotImplemented
         return self
 
+    def __eq__(self, other):
+        if other.__class__ is self.__class__:
+            return self.value == other.value
+        return NotImplemented
+
+    # Mutable (see __iadd__), so not hashable.
+    __hash__ = None
+
     def __repr__(self):
         return f"Summand({self.value})"
 
@@ -98,13 +119,15 @@ class Aggregator:
         self._acc = BaseSummand(0.0)
 
     def __call__(self, item):
+        # Accumulates into the one BaseSummand it owns; nothing is allocated per item.
+        acc = self._acc
         if isinstance(item, BaseSummand):
-            self._acc += item
+            acc.value += item.value
         elif isinstance(item, (int, float)):
-            self._acc += item
+            acc.value += item
         else:
             raise TypeError("Unsupported item for aggregation")
-        return self._acc
+        return acc
 
     def result(self):
         return self._acc.value
@@ -114,17 +137,27 @@ class Aggregator:
 # Context manager for timing
 # ------------------------------
 class Timer:
-    def __init__(self, label=""):
+    """
+    Times a block. With a histogram (anything with observe(seconds), e.g. the
+    agent's metrics.Histogram) the duration is recorded there instead of printed.
+    """
+
+    def __init__(self, label="", histogram=None):
         self.label = label
+        self.histogram = histogram
         self.t0 = None
+        self.duration = None
 
     def __enter__(self):
         self.t0 = time.perf_counter()
         return self
 
     def __exit__(self, exc_type, exc, tb):
-        dur = time.perf_counter() - self.t0
-        print(f"[Timer:{self.label}] took {dur:.6f}s")
+        self.duration = time.perf_counter() - self.t0
+        if self.histogram is not None:
+            self.histogram.observe(self.duration)
+        else:
+            print(f"[Timer:{self.label}] took {self.duration:.6f}s")
 
 
 # ------------------------------
@@ -134,38 +167,211 @@ async def async_number_producer(source: Iterable[float], delay: float = 0.0):
     for x in source:
         if delay:
             await asyncio.sleep(delay)
-        yield BaseSummand(x)
+        yield x if isinstance(x, BaseSummand) else BaseSummand(x)
 
 
 # ------------------------------
 # Generator-based coroutine consumer
 # ------------------------------
 def summing_coroutine():
-    total = BaseSummand(0.0)
+    # Neumaier-compensated like builtin sum() over floats, so the pipeline and
+    # fast_sum give the same result to the last bit.
+    total = 0.0
+    compensation = 0.0
     try:
         while True:
             item = (yield)
-            if isinstance(item, (BaseSummand, int, float)):
-                total += item
+            # The pipeline sends exact BaseSummands; those skip the isinstance checks.
+            if item.__class__ is BaseSummand:
+                x = item.value
+            elif isinstance(item, BaseSummand):
+                x = float(item.value)
+            elif isinstance(item, (int, float)):
+                x = float(item)
+            else:
+                continue
+            t = total + x
+            if abs(total) >= abs(x):
+                compensation += (total - t) + x
+            else:
+                compensation += (x - t) + total
+            total = t
     except GeneratorExit:
-        return total
+        if compensation and math.isfinite(compensation):
+            total += compensation
+        return BaseSummand(total)
 
 
 # ------------------------------
-# Simple memoizer decorator
+# Bounded, thread-safe single-flight memoization
 # ------------------------------
-def memoize(func):
-    cache = {}
-
-    @wraps(func)
-    def wrapper(*args):
-        if args in cache:
-            return cache[args]
-        res = func(*args)
-        cache[args] = res
-        return res
-
-    return wrapper
+class MemoCache:
+    """
+    LRU cache with an optional TTL (seconds). Concurrent callers of a key that is
+    being computed wait for that one computation instead of starting their own,
+    both across threads (get_or_compute) and across tasks (get_or_compute_async).
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (value, expires_at or None)
+        self._lock = threading.Lock()
+        self._in_flight = {}  # key -> concurrent.futures.Future
+        self._in_flight_async = {}  # (event loop, key) -> asyncio.Future
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, key):
+        # Caller holds the lock. Returns (found, value).
+        entry = self._data.get(key)
+        if entry is None:
+            return False, None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            self.evictions += 1
+            return False, None
+        self._data.move_to_end(key)
+        return True, value
+
+    def _store(self, key, value):
+        # Caller holds the lock.
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+                return value
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._store(key, value)
+            del self._in_flight[key]
+        future.set_result(value)
+        return value
+
+    async def get_or_compute_async(self, key, compute):
+        # compute is a zero-argument coroutine function. Tasks of one event loop share
+        # a computation; the lock is only held for dict updates, never across an await.
+        # asyncio futures belong to one loop, so in-flight entries are per running loop:
+        # other loops (e.g. asyncio.run in another thread) compute for themselves.
+        loop = asyncio.get_running_loop()
+        flight_key = (loop, key)
+        while True:
+            with self._lock:
+                found, value = self._lookup(key)
+                if found:
+                    self.hits += 1
+                    return value
+                future = self._in_flight_async.get(flight_key)
+                owner = future is None
+                if owner:
+                    future = loop.create_future()
+                    self._in_flight_async[flight_key] = future
+                    self.misses += 1
+                else:
+                    self.hits += 1
+
+            if owner:
+                break
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The owner was cancelled, not us: look again and compute if still missing.
+                if future.cancelled() and not asyncio.current_task().cancelling():
+                    continue
+                raise
+
+        try:
+            value = await compute()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight_async[flight_key]
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Nobody else may be waiting; retrieve it so asyncio does not log it.
+                future.exception()
+            raise
+        with self._lock:
+            self._store(key, value)
+            del self._in_flight_async[flight_key]
+        future.set_result(value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+def memoize(func=None, *, maxsize: int = 4096, ttl: float | None = None):
+    """Memoize on positional args with a MemoCache; usable as @memoize or @memoize(maxsize=...)."""
+
+    def decorate(func):
+        cache = MemoCache(maxsize=maxsize, ttl=ttl)
+
+        @wraps(func)
+        def wrapper(*args):
+            return cache.get_or_compute(args, lambda: func(*args))
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
+
+
+def async_memoize(func=None, *, maxsize: int = 4096, ttl: float | None = None):
+    """Like memoize, for coroutine functions."""
+
+    def decorate(func):
+        cache = MemoCache(maxsize=maxsize, ttl=ttl)
+
+        @wraps(func)
+        async def wrapper(*args):
+            return await cache.get_or_compute_async(args, lambda: func(*args))
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
 
 
 # ------------------------------
@@ -187,57 +393,312 @@ def _(obj):
 
 
 @normalize_to_iterable.register(str)
+@normalize_to_iterable.register(bytes)
+@normalize_to_iterable.register(bytearray)
+@normalize_to_iterable.register(memoryview)
+@normalize_to_iterable.register(mmap.mmap)
+@normalize_to_iterable.register(io.BufferedIOBase)
+@normalize_to_iterable.register(io.RawIOBase)
+@normalize_to_iterable.register(io.TextIOBase)
+@normalize_to_iterable.register(PurePath)
 def _(obj):
-    parts = [p.strip() for p in obj.replace(",", " ").split()]
-    return [float(p) for p in parts]
+    return itertools.chain.from_iterable(number_batches(obj))
 
 
 @normalize_to_iterable.register(int)
 def _(obj):
-    return list(range(obj))
+    return range(obj)
+
+
+@normalize_to_iterable.register(types.GeneratorType)
+def _(obj):
+    return obj
+
+
+# ------------------------------
+# Chunked numeric text parsing
+# ------------------------------
+# Bytes (or characters) read per step; peak memory is a few chunks whatever the input size.
+READ_CHUNK_SIZE = 1 << 20
+
+
+@singledispatch
+def number_batches(obj, chunk_size: int = READ_CHUNK_SIZE) -> Iterable[array]:
+    """
+    Lazily parse whitespace/comma separated numbers into array('d') batches, one batch
+    per chunk read. Numbers split across a chunk boundary are carried to the next chunk.
+    """
+    raise TypeError("Unsupported type for normalization")
+
+
+@number_batches.register(str)
+def _(obj, chunk_size=READ_CHUNK_SIZE):
+    return _parse_chunks((obj[i:i + chunk_size] for i in range(0, len(obj), chunk_size)), "", ",", " ")
+
+
+@number_batches.register(bytes)
+@number_batches.register(bytearray)
+@number_batches.register(memoryview)
+@number_batches.register(mmap.mmap)
+def _(obj, chunk_size=READ_CHUNK_SIZE):
+    return _parse_chunks(_buffer_chunks(obj, chunk_size), b"", b",", b" ")
+
+
+@number_batches.register(io.BufferedIOBase)
+@number_batches.register(io.RawIOBase)
+def _(obj, chunk_size=READ_CHUNK_SIZE):
+    return _parse_chunks(iter(lambda: obj.read(chunk_size), b""), b"", b",", b" ")
+
+
+@number_batches.register(io.TextIOBase)
+def _(obj, chunk_size=READ_CHUNK_SIZE):
+    return _parse_chunks(iter(lambda: obj.read(chunk_size), ""), "", ",", " ")
+
+
+@number_batches.register(PurePath)
+def _(obj, chunk_size=READ_CHUNK_SIZE):
+    with open(obj, "rb") as f:
+        yield from number_batches(f, chunk_size)
+
+
+def _buffer_chunks(obj, chunk_size):
+    with memoryview(obj) as view:
+        view = view.cast("B")
+        for i in range(0, len(view), chunk_size):
+            yield view[i:i + chunk_size].tobytes()
+
+
+def _parse_chunks(chunks, empty, comma, space):
+    # float() parses str and bytes tokens directly, so no decoding step is needed.
+    carry = empty
+    for chunk in chunks:
+        data = (carry + chunk).replace(comma, space)
+        parts = data.split()
+        # A chunk that does not end in whitespace may end in the middle of a number.
+        carry = parts.pop() if parts and not data[-1:].isspace() else empty
+        if parts:
+            yield array("d", map(float, parts))
+    if carry:
+        yield array("d", [float(carry)])
 
 
 # ------------------------------
 # Transform function
 # ------------------------------
-@memoize
+@memoize(maxsize=65536)
 def heavyish_transform(n: float) -> BaseSummand:
     time.sleep(0.001)
     return BaseSummand(n * 1.0)
 
 
+# ------------------------------
+# Fast paths for plain numeric input
+# ------------------------------
+STREAMING_TYPES = (str, bytes, bytearray, memoryview, mmap.mmap, io.IOBase, PurePath)
+
+
+def fast_sum(input_data: Any) -> float | None:
+    """
+    Sum plain numbers without the object pipeline; None means "not plain numeric".
+
+    heavyish_transform is the identity on numbers, so the pipeline's answer is the sum
+    of the inputs as floats. builtin sum() over floats is compensated (Python 3.12+)
+    and is what the pipeline used to return, so results are unchanged.
+    """
+    if isinstance(input_data, int):
+        # sum(range(n)) in closed form
+        return float(input_data * (input_data - 1) // 2) if input_data > 0 else 0.0
+    if isinstance(input_data, STREAMING_TYPES):
+        return sum(normalize_to_iterable(input_data))
+    if isinstance(input_data, types.GeneratorType):
+        return sum(map(float, input_data))
+    if isinstance(input_data, (list, tuple)):
+        try:
+            values = array("d", input_data)
+        except TypeError:
+            return None
+        return sum(values)
+    if np is not None and isinstance(input_data, np.ndarray) and input_data.dtype.kind in "biuf":
+        return sum(memoryview(np.ascontiguousarray(input_data, dtype=np.float64).ravel()))
+    return None
+
+
 # ------------------------------
 # High-level pipeline
 # ------------------------------
-def very_fancy_sum(input_data: Any, use_async_producer: bool = False, parallel_workers: int = 4) -> float:
+# Elements per chunk shipped to a worker process. Chunk boundaries depend only on
+# this, never on the worker count, which keeps process-mode results deterministic.
+PROCESS_CHUNK_SIZE = 4096
+
+# At most this many transforms per worker are queued or running at once, so the
+# pipeline holds O(parallel_workers) futures no matter how long the input is.
+IN_FLIGHT_PER_WORKER = 4
+
+
+def very_fancy_sum(
+    input_data: Any,
+    use_async_producer: bool = False,
+    parallel_workers: int = 4,
+    max_in_flight: int | None = None,
+    use_fast_path: bool = True,
+    use_processes: bool = False,
+    chunk_size: int = PROCESS_CHUNK_SIZE,
+    transform: Callable[[float], Any] = heavyish_transform,
+) -> float:
+    # transform maps every element to a number or BaseSummand; in process mode it must
+    # be picklable (a module-level function).
+    if use_processes:
+        # Runs transform on every element, spread over processes. The fast path
+        # does not apply here; an async producer would be silently ignored, so it is refused.
+        if use_async_producer:
+            raise ValueError("use_processes and use_async_producer cannot be combined")
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+        return _process_pipeline(normalize_to_iterable(input_data), parallel_workers, chunk_size, transform)
+
+    # fast_sum relies on heavyish_transform being the identity on numbers.
+    if use_fast_path and transform is heavyish_transform:
+        total = fast_sum(input_data)
+        if total is not None:
+            return total
+
+    # Custom Summable types (BaseSummand items) go through the object pipeline.
     iterable = normalize_to_iterable(input_data)
+    window = max_in_flight or parallel_workers * IN_FLIGHT_PER_WORKER
 
     if use_async_producer:
-        async def collect():
-            coro = summing_coroutine()
-            next(coro)
-            async for item in async_number_producer(iterable, delay=0.0):
-                with ThreadPoolExecutor(max_workers=parallel_workers) as ex:
-                    fut = ex.submit(heavyish_transform, item.value)
-                    transformed = fut.result()
-                coro.send(transformed)
-            coro.close()
-            return sum((heavyish_transform(x).value for x in iterable))
+        return asyncio.run(_async_pipeline(iterable, parallel_workers, window, transform))
 
-        return asyncio.run(collect())
+    # Sync mode: one pass, results consumed in input order as the window slides.
+    coro = summing_coroutine()
+    next(coro)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=parallel_workers) as executor:
+        for x in iterable:
+            if len(pending) >= window:
+                coro.send(pending.popleft().result())
+            pending.append(executor.submit(transform, _as_float(x)))
+        while pending:
+            coro.send(pending.popleft().result())
+
+    # close() hands back the coroutine's return value (Python 3.13+).
+    return coro.close().value
+
+
+def _as_float(item: Any) -> float:
+    # BaseSummand items carry their number in .value; anything else must be a number.
+    if isinstance(item, BaseSummand):
+        return float(item.value)
+    return float(item)
 
-    # Sync mode
+
+async def _async_pipeline(
+    iterable: Iterable[float], parallel_workers: int, window: int, transform: Callable[[float], Any]
+) -> float:
+    loop = asyncio.get_running_loop()
     coro = summing_coroutine()
     next(coro)
+
+    # The bounded queue is the backpressure: the producer waits while the workers are behind.
+    queue = asyncio.Queue(maxsize=window)
+    done = object()
+
+    async def produce():
+        # done is queued even when the input fails, so the consumer never waits forever;
+        # the error itself is re-raised by `await producer` below.
+        try:
+            async for item in async_number_producer(iterable, delay=0.0):
+                await queue.put(item)
+        finally:
+            await queue.put(done)
+
+    pending = deque()
     with ThreadPoolExecutor(max_workers=parallel_workers) as executor:
-        futures = [executor.submit(heavyish_transform, float(x)) for x in iterable]
-        for fut in futures:
-            transformed = fut.result()
-            coro.send(transformed)
-
-    coro.close()
-    computed_total = sum((heavyish_transform(float(x)).value for x in iterable))
-    return computed_total
+        producer = asyncio.create_task(produce())
+        try:
+            while (item := await queue.get()) is not done:
+                if len(pending) >= window:
+                    coro.send(await pending.popleft())
+                pending.append(loop.run_in_executor(executor, transform, item.value))
+            await producer
+            while pending:
+                coro.send(await pending.popleft())
+        finally:
+            producer.cancel()
+
+    return coro.close().value
+
+
+# ------------------------------
+# Process-pool parallel reduction
+# ------------------------------
+def _process_pipeline(
+    iterable: Iterable[float], parallel_workers: int, chunk_size: int, transform: Callable[[float], Any]
+) -> float:
+    # Chunks travel as raw float64 bytes, not as pickled per-element objects, and at
+    # most two chunks per worker are in flight so the input is never fully buffered.
+    window = parallel_workers * 2
+    partials = []
+    pending = deque()
+    iterator = iter(iterable)
+    with ProcessPoolExecutor(max_workers=parallel_workers) as executor:
+        while chunk := _float_chunk(itertools.islice(iterator, chunk_size)):
+            if len(pending) >= window:
+                partials.append(pending.popleft().result())
+            pending.append(executor.submit(_transform_and_sum_chunk, chunk.tobytes(), transform))
+        while pending:
+            partials.append(pending.popleft().result())
+
+    total, error = _tree_reduce(partials)
+    return total + error
+
+
+def _float_chunk(items: Iterable[Any]) -> array:
+    # Chunks are shipped as raw float64: BaseSummand items are unwrapped here, in the parent.
+    chunk = array("d")
+    for item in items:
+        try:
+            chunk.append(_as_float(item))
+        except (TypeError, ValueError):
+            raise TypeError(f"use_processes needs numeric items, got {type(item)}: {item!r}") from None
+    return chunk
+
+
+def _transform_and_sum_chunk(buffer: bytes, transform: Callable[[float], Any]) -> tuple[float, float]:
+    """Worker side: transform every element and return its compensated (sum, error) pair."""
+    values = array("d")
+    values.frombytes(buffer)
+    total = 0.0
+    error = 0.0
+    for x in values:
+        total, error = _add_compensated(total, error, _as_float(transform(x)))
+    return total, error
+
+
+def _add_compensated(total: float, error: float, x: float) -> tuple[float, float]:
+    # Two-sum: total + x exactly equals the new total plus the rounding error returned.
+    t = total + x
+    if abs(total) >= abs(x):
+        error += (total - t) + x
+    else:
+        error += (x - t) + total
+    return t, error
+
+
+def _tree_reduce(partials: list[tuple[float, float]]) -> tuple[float, float]:
+    """Combine (sum, error) pairs pairwise, level by level, in chunk order."""
+    if not partials:
+        return 0.0, 0.0
+    while len(partials) > 1:
+        combined = []
+        for i in range(0, len(partials) - 1, 2):
+            (a_total, a_error), (b_total, b_error) = partials[i], partials[i + 1]
+            total, error = _add_compensated(a_total, a_error + b_error, b_total)
+            combined.append((total, error))
+        if len(partials) % 2:
+            combined.append(partials[-1])
+        partials = combined
+    return partials[0]
 
 
 # ------------------------------
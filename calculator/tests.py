@@ -1,7 +1,20 @@
 # tests.py
 
+import asyncio
+import io
+import json
+import math
+import pathlib
+import tempfile
+import threading
+import time
 import unittest
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from pkg.calculator import Calculator
+from pkg.expression import compile_expression
+from pkg.stream import stream
+from pkg.very_fancy_sum import Aggregator, BaseSummand, MemoCache, async_memoize, memoize, number_batches, very_fancy_sum
 
 
 class TestCalculator(unittest.TestCase):
@@ -44,6 +57,249 @@ class TestCalculator(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.calculator.evaluate("+ 3")
 
+    def test_without_spaces(self):
+        result = self.calculator.evaluate("3+5*2")
+        self.assertEqual(result, 13)
+
+    def test_parentheses(self):
+        result = self.calculator.evaluate("(3 + 5) * (10 - 8)")
+        self.assertEqual(result, 16)
+
+    def test_unary_minus(self):
+        result = self.calculator.evaluate("-3 * -(2 + 1)")
+        self.assertEqual(result, 9)
+
+    def test_mismatched_parentheses(self):
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate("(3 + 5")
+
+    def test_compiled_program_is_cached(self):
+        compile_expression.cache_clear()
+        self.calculator.evaluate("7 * 6")
+        self.calculator.evaluate("7 * 6")
+        self.assertEqual(compile_expression.cache_info().hits, 1)
+
+    def test_variables(self):
+        result = self.calculator.evaluate("a * b + c", {"a": 2, "b": 3, "c": 4})
+        self.assertEqual(result, 10)
+
+    def test_unknown_variable(self):
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate("a + b", {"a": 1})
+
+    def test_batch_matches_scalar(self):
+        columns = {"a": array("d", [1.5, -2.0, 3.25]), "b": [0.1, 7.0, -4.0]}
+        expression = "a / b - -(a + 0.3) * b"
+        expected = [
+            self.calculator.evaluate(expression, {"a": a, "b": b})
+            for a, b in zip(columns["a"], columns["b"])
+        ]
+        self.assertEqual(list(self.calculator.evaluate_batch(expression, columns, chunk_size=2)), expected)
+        program = compile_expression(expression)
+        python_result = self.calculator._evaluate_batch_python(program, ("a", "b"), columns, 3)
+        self.assertEqual(list(python_result), expected)
+
+    def test_batch_division_by_zero(self):
+        with self.assertRaises(ZeroDivisionError):
+            self.calculator.evaluate_batch("1 / a", {"a": [1.0, 0.0]})
+
+    def test_stream_reports_errors_per_line(self):
+        out = io.StringIO()
+        expressions, errors, _ = stream(["3 + 5\n", "\n", "1 / 0\n", "2 * 2.5\n"], out)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual((expressions, errors), (3, 1))
+        self.assertEqual(records[0], {"line": 1, "expression": "3 + 5", "result": 8})
+        self.assertEqual(records[1]["line"], 3)
+        self.assertIn("error", records[1])
+        self.assertEqual(records[2]["result"], 5)
+
+    def test_stream_non_finite_results_are_errors(self):
+        out = io.StringIO()
+        expressions, errors, _ = stream(["1e999\n", "1e999 - 1e999\n", "2\n"], out)
+        # json.loads accepts Infinity/NaN, so check the strict form explicitly.
+        records = [json.loads(line, parse_constant=self.fail) for line in out.getvalue().splitlines()]
+        self.assertEqual((expressions, errors), (3, 2))
+        self.assertEqual(records[0], {"line": 1, "expression": "1e999", "error": "result is not a finite number: inf"})
+        self.assertEqual(records[1]["error"], "result is not a finite number: nan")
+        self.assertEqual(records[2]["result"], 2)
+
+
+class TestVeryFancySum(unittest.TestCase):
+    def test_sync_pipeline(self):
+        self.assertEqual(very_fancy_sum([1, 2, 3, 4.5, 6], max_in_flight=2, use_fast_path=False), 16.5)
+
+    def test_async_pipeline(self):
+        result = very_fancy_sum(
+            list(range(50)), use_async_producer=True, parallel_workers=2, max_in_flight=3, use_fast_path=False
+        )
+        self.assertEqual(result, 1225)
+
+    def test_process_mode_rejects_empty_chunks(self):
+        with self.assertRaises(ValueError):
+            very_fancy_sum([1, 2, 3], use_processes=True, chunk_size=0)
+
+    def test_custom_transform(self):
+        data = [4, 9, 16]
+        self.assertEqual(very_fancy_sum(data, transform=math.sqrt), 9)
+        self.assertEqual(very_fancy_sum(data, use_async_producer=True, use_fast_path=False, transform=math.sqrt), 9)
+        self.assertEqual(very_fancy_sum(data, use_processes=True, parallel_workers=1, transform=math.sqrt), 9)
+
+    def test_summand_items(self):
+        data = [BaseSummand(1.0), BaseSummand(2), 3, 4.5]
+        self.assertEqual(very_fancy_sum(data), 10.5)
+        self.assertEqual(very_fancy_sum(data, use_async_producer=True, parallel_workers=2), 10.5)
+        self.assertEqual(very_fancy_sum(data, use_processes=True, parallel_workers=1), 10.5)
+
+    def test_async_producer_errors_reach_the_caller(self):
+        def numbers():
+            yield 1.0
+            raise ValueError("bad input")
+
+        with self.assertRaises(TypeError):
+            very_fancy_sum(["a"], use_async_producer=True)
+        with self.assertRaisesRegex(ValueError, "bad input"):
+            very_fancy_sum(numbers(), use_async_producer=True, use_fast_path=False)
+
+    def test_process_mode_is_deterministic(self):
+        data = [0.1 * i for i in range(40)]
+        results = {very_fancy_sum(data, use_processes=True, parallel_workers=w, chunk_size=7) for w in (1, 3)}
+        self.assertEqual(len(results), 1)
+        self.assertAlmostEqual(results.pop(), sum(data))
+
+    def test_process_mode_rejects_async_producer(self):
+        with self.assertRaises(ValueError):
+            very_fancy_sum([1, 2], use_processes=True, use_async_producer=True)
+
+    def test_process_mode_rejects_non_numeric_items(self):
+        with self.assertRaisesRegex(TypeError, "use_processes needs numeric items.*'x'"):
+            very_fancy_sum([1, 2, "x"], use_processes=True, parallel_workers=1)
+
+    def test_number_batches_across_chunk_boundaries(self):
+        text = "1 2 3.5, 4,5\n  66.25 -7e1 "
+        for chunk_size in (1, 3, 100):
+            for source in (text, text.encode(), io.StringIO(text), io.BytesIO(text.encode())):
+                values = [x for batch in number_batches(source, chunk_size) for x in batch]
+                self.assertEqual(values, [1, 2, 3.5, 4, 5, 66.25, -70])
+
+    def test_streaming_sources(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = pathlib.Path(tmp) / "numbers.txt"
+            path.write_text("0.5 1.5\n2, 3\n")
+            self.assertEqual(very_fancy_sum(path), 7)
+            with open(path, "rb") as f:
+                self.assertEqual(very_fancy_sum(f, use_fast_path=False), 7)
+        self.assertEqual(very_fancy_sum(memoryview(b"1 2 3")), 6)
+        self.assertEqual(very_fancy_sum(float(x) for x in range(4)), 6)
+
+    def test_fast_path_matches_pipeline(self):
+        for data in ([0.1] * 10 + [1e16, -1e16], (10, 20.5, 30), "1 2 3.5, 4", 17):
+            self.assertEqual(very_fancy_sum(data), very_fancy_sum(data, use_fast_path=False))
+
+    def test_summand_validates_on_construction(self):
+        with self.assertRaises(TypeError):
+            BaseSummand("1")
+        summand = BaseSummand(1.5)
+        self.assertFalse(hasattr(summand, "__dict__"))
+        self.assertEqual(summand + BaseSummand(2), BaseSummand(3.5))
+        self.assertEqual(sum([BaseSummand(1), 2.5]), BaseSummand(3.5))
+
+    def test_aggregator_accumulates_in_place(self):
+        aggregate = Aggregator()
+        accumulator = aggregate(BaseSummand(1.0))
+        for item in (2, 3.5, BaseSummand(-0.5)):
+            self.assertIs(aggregate(item), accumulator)
+        self.assertEqual(aggregate.result(), 6.0)
+        with self.assertRaises(TypeError):
+            aggregate("7")
+
+
+class TestMemoCache(unittest.TestCase):
+    def test_single_flight_across_threads(self):
+        calls = []
+
+        @memoize
+        def slow(n):
+            calls.append(n)
+            time.sleep(0.05)
+            return n * 2
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(slow, [7] * 8))
+        self.assertEqual(results, [14] * 8)
+        self.assertEqual(calls, [7])
+        self.assertEqual(slow.cache.stats()["misses"], 1)
+
+    def test_lru_eviction(self):
+        cache = MemoCache(maxsize=2)
+        for key in ("a", "b", "a", "c"):
+            cache.get_or_compute(key, lambda: key.upper())
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.get_or_compute("a", lambda: "recomputed"), "A")
+        self.assertEqual(cache.get_or_compute("b", lambda: "recomputed"), "recomputed")
+
+    def test_ttl_expiry(self):
+        cache = MemoCache(ttl=0.01)
+        cache.get_or_compute("k", lambda: 1)
+        time.sleep(0.02)
+        self.assertEqual(cache.get_or_compute("k", lambda: 2), 2)
+
+    def test_single_flight_across_tasks(self):
+        calls = []
+
+        @async_memoize
+        async def slow(n):
+            calls.append(n)
+            await asyncio.sleep(0.01)
+            return n + 1
+
+        async def run():
+            return await asyncio.gather(*(slow(1) for _ in range(5)))
+
+        self.assertEqual(asyncio.run(run()), [2] * 5)
+        self.assertEqual(calls, [1])
+
+    def test_async_memoize_across_event_loops(self):
+        started = threading.Barrier(2)
+
+        @async_memoize
+        async def slow(n):
+            await asyncio.sleep(0.05)
+            return n + 1
+
+        async def run():
+            return await slow(1)
+
+        def in_thread():
+            started.wait()
+            return asyncio.run(run())
+
+        # Each thread runs its own loop; both are in flight at the same time.
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(lambda _: in_thread(), range(2)))
+        self.assertEqual(results, [2, 2])
+
+    def test_waiter_survives_owner_cancellation(self):
+        calls = []
+
+        @async_memoize
+        async def slow(n):
+            calls.append(n)
+            await asyncio.sleep(0.05)
+            return n + 1
+
+        async def run():
+            owner = asyncio.create_task(slow(1))
+            await asyncio.sleep(0)
+            waiter = asyncio.create_task(slow(1))
+            await asyncio.sleep(0.01)
+            owner.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await owner
+            return await waiter
+
+        self.assertEqual(asyncio.run(run()), 2)
+        self.assertEqual(calls, [1, 1])
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,36 +1,95 @@
-from functions.get_files_info import get_files_info
-from functions.get_file_content import get_file_content
-from functions.run_python_file import run_python_file
-from functions.write_file import write_file
-from functions.delete_file import delete_file  # <-- Added import
-from google.genai import types
-    
+import importlib
+import time
+from config import PREFETCH_BUDGET_BYTES
+from metrics import REGISTRY
+from prefetch import FileCache, Prefetcher
+
 
 working_directory = "."
 
+# Tool name -> module defining it (the function and its schema_<name>).
+# Modules are imported the first time a tool is needed, not when this file is imported.
+TOOLS = {
+    "get_files_info": "functions.get_files_info",
+    "get_file_content": "functions.get_file_content",
+    "get_many_file_contents": "functions.get_many_file_contents",
+    "write_file": "functions.write_file",
+    "run_python_file": "functions.run_python_file",
+    "delete_file": "functions.delete_file",
+    "run_tests": "functions.run_tests",
+}
+
+
+def load_tool(name):
+    """Return the tool function called name, importing its module on first use. None for unknown tools."""
+    module_name = TOOLS.get(name)
+    if module_name is None:
+        return None
+    return getattr(importlib.import_module(module_name), name)
+
+
+def tool_schemas():
+    """The function declarations of every tool, in TOOLS order."""
+    return [getattr(importlib.import_module(module_name), f"schema_{name}") for name, module_name in TOOLS.items()]
+
+
+# Files read during this session. Both read tools go through it, listings fill it ahead of time.
+file_cache = FileCache()
+_prefetcher = None
+
+
+def prefetch_listing(directory="."):
+    """Read the small text files of a just-listed directory into file_cache in the background."""
+    global _prefetcher
+    if PREFETCH_BUDGET_BYTES <= 0:
+        return 0
+    if _prefetcher is None:
+        _prefetcher = Prefetcher(file_cache, load_tool("get_file_content"))
+    return _prefetcher.after_listing(working_directory, directory)
+
+
+def _cached_read(working_directory, file_path):
+    return file_cache.read(working_directory, load_tool("get_file_content"), file_path)
+
+
+def _run_tool(name, tool, args):
+    if name == "get_file_content":
+        return file_cache.read(working_directory, tool, **args)
+    if name == "get_many_file_contents":
+        return tool(working_directory, read_file=_cached_read, **args)
+
+    result = tool(working_directory, **args)
+    if name == "get_files_info" and not result.startswith("Error"):
+        prefetch_listing(args.get("directory", "."))
+    elif name in ("write_file", "delete_file") and "file_path" in args:
+        file_cache.invalidate(working_directory, args["file_path"])
+    return result
+
+
+def _record_tool_call(name, result, duration):
+    # Unknown tools are counted under one label so a misbehaving model cannot blow up the registry.
+    tool = name if result != "" else "unknown"
+    REGISTRY.histogram("agent_tool_duration_seconds", "Time spent running a tool call.", {"tool": tool}).observe(duration)
+    if result == "" or result.startswith("Error"):
+        REGISTRY.counter("agent_tool_errors_total", "Tool calls that returned an error.", {"tool": tool}).inc()
+
 def call_function(function_call_part, verbose=False):
-    if verbose: 
+    from google.genai import types
+
+    if verbose:
         print(f"Calling function: {function_call_part.name}({function_call_part.args})")
     else:
         print(f" - Calling function: {function_call_part.name}")
-        
-    result = ""    
-    
-    if function_call_part.name == "get_files_info":
-        result = get_files_info(working_directory , **function_call_part.args)
-        
-    if function_call_part.name == "get_file_content":
-        result = get_file_content(working_directory , **function_call_part.args)
-    
-    if function_call_part.name == "write_file":
-        result = write_file(working_directory , **function_call_part.args)
-    
-    if function_call_part.name == "run_python_file":
-        result = run_python_file(working_directory , **function_call_part.args)
-
-    if function_call_part.name == "delete_file":  # <-- Added minimal branch
-        result = delete_file(working_directory , **function_call_part.args)
-    
+
+    result = ""
+    started = time.perf_counter()
+
+    tool = load_tool(function_call_part.name)
+    if tool is not None:
+        result = _run_tool(function_call_part.name, tool, function_call_part.args)
+
+    _record_tool_call(function_call_part.name, result, time.perf_counter() - started)
+
     if result == "":
         return types.Content(
             role="tool",
@@ -41,7 +100,7 @@ def call_function(function_call_part, verbose=False):
                 )
             ],
         )
-        
+
     return types.Content(
         role="tool",
         parts=[
@@ -1 +1,25 @@
-MAX_CHARS = 10000  
+MAX_CHARS = 10000
+
+# Tool outputs of older iterations are replaced by short digests, only this many stay verbatim.
+TOOL_OUTPUT_HISTORY = 3
+
+# Model calls: attempts per call for transient errors (429/5xx/network), the time budget
+# of a whole session in seconds, and whether slow calls get a second, hedged request.
+MODEL_MAX_ATTEMPTS = 5
+SESSION_DEADLINE = 600
+HEDGE_REQUESTS = False
+
+# Read-ahead after get_files_info: small text files of the listed directory are loaded
+# into the session cache in the background, at most PREFETCH_BUDGET_BYTES per session
+# (0 turns it off). Patterns in PREFETCH_IGNORE match any path component.
+PREFETCH_BUDGET_BYTES = 512 * 1024
+PREFETCH_MAX_FILE_BYTES = 64 * 1024
+PREFETCH_EXTENSIONS = (
+    ".py", ".pyi", ".txt", ".md", ".rst", ".toml", ".cfg", ".ini", ".json", ".yaml", ".yml",
+    ".js", ".ts", ".html", ".css", ".sh", ".cs",
+)
+PREFETCH_IGNORE = (".*", "__pycache__", "node_modules", "venv", "*.min.*", "*.lock")
+
+# get_many_file_contents: files per call and characters returned per call.
+MAX_FILES_PER_CALL = 20
+MAX_MANY_CHARS = 40000
@@ -0,0 +1,110 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+"""
+A local stand-in for the Gemini generateContent endpoint, for testing the retry,
+backoff and hedging in resilience.py without a key or network.
+
+    python fake_gemini_server.py --port 8765 --failure-rate 0.3 --latency 0.2 --slow-rate 0.1
+    GEMINI_BASE_URL=http://127.0.0.1:8765 GEMINI_API_KEY=fake uv run main.py "hello" --verbose
+
+Every request answers with plain text (no function calls), after `latency` seconds,
+or `slow_latency` seconds for a `slow_rate` share of requests. A `failure_rate`
+share fails with 429 or 503 instead.
+"""
+
+FAILURES = [
+    (429, "RESOURCE_EXHAUSTED", "Quota exceeded (injected by fake_gemini_server)."),
+    (503, "UNAVAILABLE", "The model is overloaded (injected by fake_gemini_server)."),
+]
+
+
+class FakeGemini:
+    def __init__(self, latency=0.05, slow_latency=2.0, slow_rate=0.0, failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.slow_latency = slow_latency
+        self.slow_rate = slow_rate
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def next_outcome(self):
+        with self._lock:
+            self.requests += 1
+            slow = self.rng.random() < self.slow_rate
+            failure = self.rng.choice(FAILURES) if self.rng.random() < self.failure_rate else None
+            if failure:
+                self.failures += 1
+            return (self.slow_latency if slow else self.latency), failure
+
+    def response_body(self, request):
+        contents = request.get("contents", [])
+        prompt_tokens = sum(len(json.dumps(content)) // 4 for content in contents)
+        return {
+            "candidates": [
+                {
+                    "content": {"role": "model", "parts": [{"text": f"fake answer after {len(contents)} messages"}]},
+                    "finishReason": "STOP",
+                }
+            ],
+            "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": 6, "totalTokenCount": prompt_tokens + 6},
+        }
+
+
+def make_server(fake, port=0, host="127.0.0.1"):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.split("?")[0].endswith(":generateContent"):
+                self._send(404, {"error": {"code": 404, "message": f"unknown path {self.path}", "status": "NOT_FOUND"}})
+                return
+            delay, failure = fake.next_outcome()
+            time.sleep(delay)
+            if failure:
+                code, status, message = failure
+                self._send(code, {"error": {"code": code, "message": message, "status": status}})
+            else:
+                self._send(200, fake.response_body(request))
+
+        def _send(self, code, body):
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Gemini generateContent server with injected latency and failures.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per normal response")
+    parser.add_argument("--slow-latency", type=float, default=2.0, help="seconds per slow (tail) response")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="share of slow responses, 0..1")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of 429/503 responses, 0..1")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    fake = FakeGemini(args.latency, args.slow_latency, args.slow_rate, args.failure_rate, args.seed)
+    server = make_server(fake, args.port)
+    print(f"Fake Gemini listening on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
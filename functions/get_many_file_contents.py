@@ -0,0 +1,83 @@
+from config import MAX_FILES_PER_CALL, MAX_MANY_CHARS  # Limits so one call cannot flood the AI with text
+from functions.get_file_content import get_file_content  # Reuses the single file reader with all its safety checks
+from google.genai import types  # Imports the functions needed for the google ai
+
+
+def get_many_file_contents(working_directory, file_paths, read_file=None):
+    """
+    get_many_file_contents = This function reads several files in one go and returns them together.
+    Without it the AI needs one round trip per file which is slow, with it one call is enough.
+    working_directory = The base directory we can't go outside this
+    file_paths = List of the files to read, relative to the working directory.
+    read_file = The function used to read one file, call_functions passes a cached one.
+    Every file goes through get_file_content so the same checks and limits apply.
+    """
+
+    # If nothing special is given we just read straight from the disk.
+    if read_file is None:
+        read_file = get_file_content
+
+    # The AI might send a single string instead of a list, that is still one file.
+    if isinstance(file_paths, str):
+        file_paths = [file_paths]
+
+    # Nothing to read is an error so the AI knows it did something wrong.
+    if not file_paths:
+        return "Error: No file paths given"
+
+    # Too many files at once would take forever, the rest can come in another call.
+    too_many = list(file_paths[MAX_FILES_PER_CALL:])
+    file_paths = list(file_paths[:MAX_FILES_PER_CALL])
+
+    # Read the files in the order asked. Files listed just before are usually already
+    # read ahead by call_functions, so this is mostly lookups and needs no threads.
+    contents = [read_file(working_directory, path) for path in file_paths]
+
+    # Build one answer with a header per file, like `head file1 file2` does in the terminal.
+    sections = []
+    skipped = []
+    total_chars = 0
+    for path, content in zip(file_paths, contents):
+        # Once the total limit is reached the remaining files are listed as skipped instead.
+        if sections and total_chars + len(content) > MAX_MANY_CHARS:
+            skipped.append(path)
+            continue
+        total_chars += len(content)
+        # The blank line between files comes from the join, so trailing newlines are dropped here.
+        content = content.rstrip("\n")
+        sections.append(f"==> {path} <==\n{content}")
+
+    final_response_ai = "\n\n".join(sections)
+    skipped += too_many
+
+    # Tell the AI which files it did not get so it can ask for them again.
+    if skipped:
+        final_response_ai += f"\n\n[Not read, limit reached: {', '.join(skipped)}. Call again for these files.]"
+
+    return final_response_ai
+
+
+schema_get_many_file_contents = types.FunctionDeclaration(
+    name="get_many_file_contents",
+
+    # Description tells the AI when this is better than get_file_content
+    description=(
+        f"Reads several files within the working directory in one call and returns each one under a '==> path <==' header. "
+        f"Prefer it over repeated get_file_content calls. At most {MAX_FILES_PER_CALL} files and {MAX_MANY_CHARS} characters per call."
+    ),
+
+    parameters=types.Schema(
+        type=types.Type.OBJECT,
+
+        properties={
+            # A list of strings, one path per file
+            "file_paths": types.Schema(
+                type=types.Type.ARRAY,
+                items=types.Schema(type=types.Type.STRING),
+                description="The paths of the files to read, relative to the working directory.",
+            ),
+        },
+
+        required=["file_paths"],
+    ),
+)
@@ -0,0 +1,287 @@
+import ast  # Reads imports out of python files without running them.
+import hashlib  # File hashes tell us which files changed since the last run.
+import json  # The hash cache is stored as a small JSON file.
+import os  # Import OS module for file system paths and directories.
+import subprocess  # Every test file runs in its own python process.
+import sys  # sys.executable is the python the agent itself runs on.
+import time
+from concurrent.futures import ThreadPoolExecutor  # Runs several test processes at once.
+from google.genai import types  # Import the function declaration types for AI schema definition.
+
+# Stored in the working directory, remembers the file hashes each test file was last run against.
+CACHE_FILE = ".run_tests_cache.json"
+
+# Folders that never contain project tests.
+IGNORED_DIRS = {".git", "__pycache__", ".venv", "venv", "node_modules", ".pytest_cache", ".mypy_cache", ".tox", ".nox"}
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "run_tests_worker.py")
+RESULT_MARKER = "__RUN_TESTS_RESULT__"
+
+# Failure messages are cut to this many characters so a failing suite does not flood the prompt.
+MAX_MESSAGE_CHARS = 200
+
+
+def run_tests(working_directory: str, directory=".", run_all=False, workers=None):
+    """
+    run_tests = This function finds unittest and pytest style tests inside the working directory
+    and runs them in parallel python processes, one process per test file.
+
+    directory = Folder (relative to the working directory) to look for tests in.
+    run_all = If False only test files affected by changed files are run.
+    workers = How many test processes run at the same time (defaults to the CPU count).
+
+    1 Test files are test_*.py, *_test.py and tests.py files that actually define tests.
+    2 A test file is "affected" when it or any file it imports (directly or not) changed since
+      its last run, or when it failed last time.
+    3 Returns a compact summary: counts first, then one line per failing test.
+    """
+
+    abs_working_directory = os.path.abspath(working_directory)
+    abs_directory = os.path.abspath(os.path.join(working_directory, directory))
+
+    if not abs_directory.startswith(abs_working_directory):
+        return f'Error: Cannot test "{directory}" as it is outside the permitted working directory'
+
+    if not os.path.isdir(abs_directory):
+        return f'Error: "{directory}" is not a directory'
+
+    started = time.perf_counter()
+
+    test_files = _discover_test_files(abs_directory)
+    if not test_files:
+        return f'No tests found in "{directory}"'
+
+    cache_path = os.path.join(abs_working_directory, CACHE_FILE)
+    cache = _load_cache(cache_path)
+
+    # Work out the dependency closure and its hashes for every test file.
+    hashes = {}
+    fingerprints = {}
+    for test_file in test_files:
+        deps = _dependency_closure(test_file, abs_working_directory)
+        fingerprints[test_file] = {_relative(dep, abs_working_directory): _file_hash(dep, hashes) for dep in deps}
+
+    selected = []
+    for test_file in test_files:
+        entry = cache.get(_relative(test_file, abs_working_directory))
+        if run_all or entry is None or not entry.get("ok") or entry.get("deps") != fingerprints[test_file]:
+            selected.append(test_file)
+
+    unchanged = len(test_files) - len(selected)
+
+    records = []
+    if selected:
+        max_workers = workers or min(len(selected), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            outcomes = list(executor.map(_run_test_file, selected))
+
+        for test_file, file_records in zip(selected, outcomes):
+            rel_test_file = _relative(test_file, abs_working_directory)
+            ok = all(record["status"] in ("passed", "skipped") for record in file_records)
+            cache[rel_test_file] = {"deps": fingerprints[test_file], "ok": ok}
+            for record in file_records:
+                record["file"] = rel_test_file
+                records.append(record)
+
+        _save_cache(cache_path, cache)
+
+    return _format_summary(records, len(selected), unchanged, time.perf_counter() - started)
+
+
+def _discover_test_files(abs_directory):
+    test_files = []
+    for root, dirs, files in os.walk(abs_directory):
+        dirs[:] = sorted(d for d in dirs if d not in IGNORED_DIRS and not d.startswith("."))
+        for name in sorted(files):
+            if not name.endswith(".py"):
+                continue
+            if name.startswith("test_") or name.endswith("_test.py") or name == "tests.py":
+                path = os.path.join(root, name)
+                if _defines_tests(path):
+                    test_files.append(path)
+    return test_files
+
+
+def _defines_tests(path):
+    # Checked with ast so plain scripts that happen to be called test*.py are never executed.
+    tree = _parse(path)
+    if tree is None:
+        return False
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith("test"):
+            return True
+        if isinstance(node, ast.ClassDef):
+            if node.name.startswith("Test") or any(_base_name(base) == "TestCase" for base in node.bases):
+                return True
+    return False
+
+
+def _base_name(node):
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Name):
+        return node.id
+    return None
+
+
+def _parse(path):
+    try:
+        with open(path, "rb") as f:
+            return ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+
+def _dependency_closure(test_file, abs_working_directory):
+    """
+    _dependency_closure = Every project file the test file imports, directly or through other
+    project files. Imports that do not resolve to a file inside the working directory
+    (stdlib, installed packages) are ignored.
+    """
+    # The test runs with its own folder first on sys.path, then the working directory.
+    search_roots = [os.path.dirname(test_file), abs_working_directory]
+
+    seen = {test_file}
+    stack = [test_file]
+    while stack:
+        path = stack.pop()
+        for dep in _imported_files(path, search_roots):
+            if dep not in seen and dep.startswith(abs_working_directory):
+                seen.add(dep)
+                stack.append(dep)
+    return sorted(seen)
+
+
+def _imported_files(path, search_roots):
+    tree = _parse(path)
+    if tree is None:
+        return []
+
+    found = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                found.extend(_resolve(alias.name, search_roots))
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                # Relative import: start from the importing file's package folder.
+                base = os.path.dirname(path)
+                for _ in range(node.level - 1):
+                    base = os.path.dirname(base)
+                roots = [base]
+                module = node.module or ""
+            else:
+                roots = search_roots
+                module = node.module
+            found.extend(_resolve(module, roots))
+            # "from pkg import calculator" can name a submodule rather than an attribute.
+            for alias in node.names:
+                found.extend(_resolve(f"{module}.{alias.name}" if module else alias.name, roots))
+    return found
+
+
+def _resolve(module, roots):
+    parts = module.split(".") if module else []
+    for root in roots:
+        base = os.path.join(root, *parts)
+        for candidate in (base + ".py", os.path.join(base, "__init__.py")):
+            if os.path.isfile(candidate):
+                return [os.path.abspath(candidate)]
+    return []
+
+
+def _file_hash(path, hashes):
+    if path not in hashes:
+        with open(path, "rb") as f:
+            hashes[path] = hashlib.sha1(f.read()).hexdigest()
+    return hashes[path]
+
+
+def _run_test_file(test_file):
+    try:
+        output = subprocess.run(
+            # The agent's own interpreter, not whatever "python3" happens to be first on PATH.
+            [sys.executable, WORKER_SCRIPT, test_file],
+            cwd=os.path.dirname(test_file),
+            timeout=60,
+            capture_output=True,
+            text=True,
+        )
+    except Exception as e:
+        return [{"test": "<module>", "status": "error", "message": f"could not run tests: {e}"}]
+
+    for line in reversed(output.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])["records"]
+
+    # The worker died before reporting (crash, sys.exit in the test module...).
+    stderr_lines = output.stderr.strip().splitlines()
+    message = stderr_lines[-1] if stderr_lines else f"process exited with code {output.returncode}"
+    return [{"test": "<module>", "status": "error", "message": message}]
+
+
+def _format_summary(records, files_run, unchanged, duration):
+    counts = {"passed": 0, "failed": 0, "error": 0, "skipped": 0}
+    for record in records:
+        counts[record["status"]] += 1
+
+    summary = (
+        f"{counts['passed']} passed, {counts['failed']} failed, {counts['error']} errors, "
+        f"{counts['skipped']} skipped in {files_run} files ({unchanged} unchanged files not run) "
+        f"[{duration:.2f}s]"
+    )
+
+    lines = [summary]
+    for record in records:
+        if record["status"] in ("failed", "error"):
+            message = record["message"][:MAX_MESSAGE_CHARS]
+            lines.append(f"{record['status'].upper()} {record['file']}::{record['test']}: {message}")
+    return "\n".join(lines)
+
+
+def _relative(path, abs_working_directory):
+    return os.path.relpath(path, abs_working_directory)
+
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache_path, cache):
+    try:
+        with open(cache_path, "w") as f:
+            json.dump(cache, f, indent=1, sort_keys=True)
+    except OSError:
+        # A missing cache only means everything runs again next time.
+        pass
+
+
+schema_run_tests = types.FunctionDeclaration(
+    # Function name — must exactly match the function above for proper tool linkage.
+    name="run_tests",
+
+    # Description — Tells the AI what this function actually does.
+    description="Runs the unittest/pytest style tests in a directory in parallel and returns a compact pass/fail summary. By default only tests affected by files changed since their last run are executed.",
+
+    parameters=types.Schema(
+        type=types.Type.OBJECT,
+
+        properties={
+            # directory — Where to look for test files.
+            "directory": types.Schema(
+                type=types.Type.STRING,
+                description="Directory to search for tests, relative to the working directory. Defaults to the working directory itself.",
+            ),
+
+            # run_all — Skip the affected-test selection.
+            "run_all": types.Schema(
+                type=types.Type.BOOLEAN,
+                description="Run every test file, not only the ones affected by changed files.",
+            ),
+        },
+    ),
+)
@@ -0,0 +1,121 @@
+import importlib.util  # Loads the test file as a module straight from its path.
+import inspect  # Used to find pytest style test functions and classes.
+import json  # Results are sent back to run_tests as one JSON line.
+import os
+import sys
+import time
+import traceback
+import unittest
+
+# run_tests reads the line that starts with this marker, everything else the tests print is ignored.
+RESULT_MARKER = "__RUN_TESTS_RESULT__"
+
+
+class _CollectingResult(unittest.TestResult):
+    """
+    _CollectingResult = A unittest result that keeps one small record per test
+    instead of printing dots, so the parent process gets structured pass/fail data.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def _record(self, test, status, err=None):
+        message = ""
+        if err is not None:
+            # Only the last line of the traceback ("AssertionError: 5 != 6") is kept to stay compact.
+            lines = "".join(traceback.format_exception(*err)).strip().splitlines()
+            message = lines[-1] if lines else ""
+        self.records.append({"test": _test_name(test), "status": status, "message": message})
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self._record(test, "passed")
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._record(test, "failed", err)
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self._record(test, "error", err)
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self.records.append({"test": _test_name(test), "status": "skipped", "message": reason})
+
+    def addExpectedFailure(self, test, err):
+        super().addExpectedFailure(test, err)
+        self._record(test, "passed")
+
+    def addUnexpectedSuccess(self, test):
+        super().addUnexpectedSuccess(test)
+        self.records.append({"test": _test_name(test), "status": "failed", "message": "unexpected success"})
+
+
+def _test_name(test):
+    # FunctionTestCase wraps pytest style functions, use the function name for those.
+    if isinstance(test, unittest.FunctionTestCase):
+        return test._testFunc.__qualname__
+    return f"{type(test).__name__}.{test._testMethodName}"
+
+
+def _pytest_style_tests(module):
+    """
+    _pytest_style_tests = Wraps plain `test_*` functions and `Test*` classes (that are not
+    unittest.TestCase) as unittest cases so both styles run through the same result object.
+    Functions that take arguments need pytest fixtures and are left out.
+    """
+    cases = []
+    for name, obj in vars(module).items():
+        if getattr(obj, "__module__", None) != module.__name__:
+            continue
+        if name.startswith("test") and inspect.isfunction(obj):
+            if not inspect.signature(obj).parameters:
+                cases.append(unittest.FunctionTestCase(obj))
+        elif name.startswith("Test") and inspect.isclass(obj) and not issubclass(obj, unittest.TestCase):
+            for method_name, method in vars(obj).items():
+                if method_name.startswith("test") and inspect.isfunction(method):
+                    cases.append(unittest.FunctionTestCase(_bind(obj, method_name), description=method_name))
+    return cases
+
+
+def _bind(cls, method_name):
+    # A fresh instance per test, like pytest does.
+    def run():
+        getattr(cls(), method_name)()
+
+    run.__qualname__ = f"{cls.__name__}.{method_name}"
+    return run
+
+
+def main(test_file):
+    abs_test_file = os.path.abspath(test_file)
+
+    # Same import rules as "python tests.py": the file's own folder comes first on sys.path.
+    sys.path.insert(0, os.path.dirname(abs_test_file))
+    module_name = os.path.splitext(os.path.basename(abs_test_file))[0]
+
+    started = time.perf_counter()
+    result = _CollectingResult()
+    try:
+        spec = importlib.util.spec_from_file_location(module_name, abs_test_file)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+
+        suite = unittest.defaultTestLoader.loadTestsFromModule(module)
+        suite.addTests(_pytest_style_tests(module))
+        suite.run(result)
+    except Exception:
+        # Import errors and the like fail the whole file with one record.
+        lines = traceback.format_exc().strip().splitlines()
+        result.records.append({"test": "<module>", "status": "error", "message": lines[-1]})
+
+    payload = {"records": result.records, "duration": time.perf_counter() - started}
+    sys.stdout.write("\n" + RESULT_MARKER + json.dumps(payload) + "\n")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1])
@@ -1,108 +1,253 @@
+import importlib
 import os
 import sys
-from dotenv import load_dotenv
-from google import genai
-from google.genai import types
+import time
 
-from functions.get_files_info import schema_get_files_info
-from functions.get_file_content import schema_get_file_content
-from functions.run_python_file import schema_run_python_file
-from functions.write_file import schema_write_file
-from functions.delete_file import schema_delete_file
-from call_functions import call_function
+STARTED = time.perf_counter()
 
-# ✅ Memory integration
-from memory import init_db, save_message, load_messages
+# Only the standard library is imported up front. The SDK, dotenv, the tools and
+# the agent modules are loaded by load() once we know the invocation needs them,
+# so `--help` and argument errors return without paying for google.genai.
+
+USAGE = """Usage: python main.py "<prompt>" [--verbose]
+       python main.py --resume [--verbose]
+       python main.py --profile-startup
+
+  --resume           continue the last run from its last saved iteration
+  --verbose          print token counts, tool calls and output savings
+  --profile-startup  load everything a run needs, report time per import and exit
+  -h, --help         show this message"""
+
+FLAGS = {"--resume", "--verbose", "--profile-startup", "-h", "--help"}
+
+# (module, seconds) for every module loaded through load(), in load order.
+IMPORT_TIMES = []
+
+
+def load(module_name):
+    """Import module_name on first use and record how long the import took."""
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    started = time.perf_counter()
+    module = importlib.import_module(module_name)
+    IMPORT_TIMES.append((module_name, time.perf_counter() - started))
+    return module
+
+
+def parse_args(argv):
+    """Split argv into (prompt, flags). Exits on --help and on usage errors."""
+    flags = {arg for arg in argv if arg in FLAGS}
+    unknown = [arg for arg in argv if arg.startswith("--") and arg not in FLAGS]
+    positional = [arg for arg in argv if arg not in FLAGS and not arg.startswith("--")]
+
+    if "-h" in flags or "--help" in flags:
+        print(USAGE)
+        sys.exit(0)
+    if unknown:
+        print(f"Unknown option: {unknown[0]}\n\n{USAGE}")
+        sys.exit(2)
+    if not positional and not flags & {"--resume", "--profile-startup"}:
+        print("Bro, I need a prompt!")
+        sys.exit(1)
+    return (positional[0] if positional else None), flags
 
 
 def main():
-    load_dotenv()
+    prompt, flags = parse_args(sys.argv[1:])
+    # "--resume" instead of a prompt continues the last run from its last saved iteration.
+    resume = "--resume" in flags
+    verbose_flag = "--verbose" in flags
+
+    load("dotenv").load_dotenv()
+    genai = load("google.genai")
+    types = load("google.genai.types")
+    call_functions = load("call_functions")
+    memory = load("memory")
+    metrics = load("metrics")
+    config_module = load("config")
+    load("resilience")
+    tool_results = load("tool_results")
+
     api_key = os.environ.get("GEMINI_API_KEY")
-    client = genai.Client(api_key=api_key)
+    # GEMINI_BASE_URL points the client at another endpoint, e.g. fake_gemini_server.py.
+    base_url = os.environ.get("GEMINI_BASE_URL")
+    http_options = types.HttpOptions(base_url=base_url) if base_url else None
+    client = genai.Client(api_key=api_key, http_options=http_options)
 
     system_prompt = """
     You are a helpful AI coding agent.
     When a user asks a question or makes a request, make a function call plan.
-    You can perform operations like listing files, reading/writing files, and executing Python files.
+    You can perform operations like listing files, reading/writing files, executing Python files and running tests.
+    To read several files, use get_many_file_contents once instead of get_file_content for each file.
     All paths you provide should be relative to the working directory.
     """
 
-    if len(sys.argv) < 2:
-        print("Bro, I need a prompt!")
-        sys.exit(1)
-
-    prompt = sys.argv[1]
-    verbose_flag = len(sys.argv) == 3 and sys.argv[2] == "--verbose"
-
-    # Initialize DB and load messages
-    init_db()
-    messages = load_messages()
-
-    # Add current user input
-    user_message = types.Content(role="user", parts=[types.Part(text=prompt)])
-    messages.append(user_message)
-    save_message("user", prompt)
-
-    available_functions = types.Tool(
-        function_declarations=[
-            schema_get_files_info,
-            schema_get_file_content,
-            schema_run_python_file,
-            schema_write_file,
-            schema_delete_file,
-        ]
-    )
+    # Tool modules are only imported here, for their schemas.
+    for module_name in call_functions.TOOLS.values():
+        load(module_name)
+    available_functions = types.Tool(function_declarations=call_functions.tool_schemas())
 
     config = types.GenerateContentConfig(
         tools=[available_functions],
         system_instruction=system_prompt
     )
 
+    if "--profile-startup" in flags:
+        print_startup_profile()
+        return
+
+    # Initialize DB and load messages
+    memory.init_db()
+    messages = memory.load_messages()
+    drop_unanswered_calls(messages)
+    # Earlier runs' tool outputs come back verbatim; digest all but the most recent
+    # before the first model call, as generate_content does after every tool turn.
+    tool_results.compact_history(messages, config_module.TOOL_OUTPUT_HISTORY)
+
+    if resume:
+        if not can_resume(messages):
+            print("Nothing to resume.")
+            sys.exit(1)
+    else:
+        # Add current user input
+        user_message = types.Content(role="user", parts=[types.Part(text=prompt)])
+        messages.append(user_message)
+        memory.save_message("user", prompt)
+
     if verbose_flag:
-        print(f"Prompt: {prompt}\n")
+        print(f"Prompt: {prompt}\n" if prompt else "Resuming the last run\n")
 
-    generate_content(client, messages, config, verbose_flag)
+    # METRICS_PORT serves live metrics while the agent runs, METRICS_FILE gets a snapshot at the end.
+    metrics_port = os.environ.get("METRICS_PORT")
+    if metrics_port:
+        metrics.REGISTRY.serve(int(metrics_port))
 
+    try:
+        generate_content(client, messages, config, verbose_flag)
+    finally:
+        metrics_file = os.environ.get("METRICS_FILE")
+        if metrics_file:
+            metrics.REGISTRY.write(metrics_file)
 
-def generate_content(client, messages, config, verbose):
-    MAX_ITERATIONS = 25
 
-    for iteration in range(MAX_ITERATIONS):
-        try:
-            response = client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=messages,
-                config=config
-            )
-
-            if verbose:
-                print(f"\n--- Iteration {iteration + 1} ---")
-                print(f"Prompt tokens: {response.usage_metadata.prompt_token_count}")
-                print(f"Response tokens: {response.usage_metadata.candidates_token_count}")
-
-            if not response.function_calls:
-                print("Final response:")
-                print(response.text)
-                save_message("assistant", response.text)
-                break
+def print_startup_profile():
+    total = sum(seconds for _, seconds in IMPORT_TIMES)
+    width = max(len(name) for name, _ in IMPORT_TIMES)
+    print(f"{'import':<{width}}  {'ms':>8}")
+    for name, seconds in IMPORT_TIMES:
+        print(f"{name:<{width}}  {seconds * 1000:8.1f}")
+    print(f"{'total imports':<{width}}  {total * 1000:8.1f}")
+    print(f"{'main.py start to ready':<{width}}  {(time.perf_counter() - STARTED) * 1000:8.1f}")
 
-            for candidate in response.candidates:
-                messages.append(candidate.content)
-                save_message("assistant", candidate.content.parts[0].text)
 
-            function_responses = []
-            for function_call_part in response.function_calls:
-                result = call_function(function_call_part, verbose)
-                function_responses.append(result.parts[0])
-                save_message("tool", result.parts[0].text if hasattr(result.parts[0], "text") else str(result.parts[0]))
+def generate_content(client, messages, config, verbose):
+    # Already loaded by main(); imported here so the module itself stays cheap to import.
+    from google.genai import types
+    from call_functions import call_function, working_directory
+    from config import HEDGE_REQUESTS, MODEL_MAX_ATTEMPTS, SESSION_DEADLINE, TOOL_OUTPUT_HISTORY
+    from memory import save_content
+    from metrics import REGISTRY
+    from resilience import ResilientCaller, RetryPolicy
+    from tool_results import compact_history, estimate_tokens, shape_part
 
-            messages.append(types.Content(role="tool", parts=function_responses))
+    MAX_ITERATIONS = 25
+    model_call_seconds = REGISTRY.histogram("agent_model_call_seconds", "Latency of one generate_content round trip.")
+    prompt_tokens = REGISTRY.counter("agent_prompt_tokens_total", "Prompt tokens sent to the model.")
+    response_tokens = REGISTRY.counter("agent_response_tokens_total", "Tokens generated by the model.")
+
+    # Transient errors (429, 5xx, network) are retried with backoff inside the session deadline.
+    call_model = ResilientCaller(
+        client.models.generate_content,
+        RetryPolicy(max_attempts=MODEL_MAX_ATTEMPTS),
+        deadline=SESSION_DEADLINE,
+        hedge=HEDGE_REQUESTS,
+        latency=model_call_seconds,
+    )
 
-        except Exception as e:
-            print(f"Error during generation: {e}")
-            break
-    else:
-        print(f"\nReached maximum iterations ({MAX_ITERATIONS}). Agent may not have completed its task.")
+    try:
+        for iteration in range(MAX_ITERATIONS):
+            try:
+                response = call_model(
+                    model="gemini-2.0-flash",
+                    contents=messages,
+                    config=config
+                )
+                if response.usage_metadata:
+                    prompt_tokens.inc(response.usage_metadata.prompt_token_count or 0)
+                    response_tokens.inc(response.usage_metadata.candidates_token_count or 0)
+
+                if verbose:
+                    print(f"\n--- Iteration {iteration + 1} ---")
+                    print(f"Prompt tokens: {response.usage_metadata.prompt_token_count}")
+                    print(f"Response tokens: {response.usage_metadata.candidates_token_count}")
+                    if call_model.attempts > iteration + 1:
+                        print(f"Model attempts so far: {call_model.attempts} ({call_model.hedged} hedged)")
+
+                if not response.function_calls:
+                    print("Final response:")
+                    print(response.text)
+                    save_content(response.candidates[0].content, response.text)
+                    break
+
+                for candidate in response.candidates:
+                    messages.append(candidate.content)
+
+                function_responses = []
+                raw_chars = shaped_chars = 0
+                for function_call_part in response.function_calls:
+                    result = call_function(function_call_part, verbose)
+                    part, raw, shaped = shape_part(result.parts[0], working_directory)
+                    raw_chars += raw
+                    shaped_chars += shaped
+                    function_responses.append(part)
+
+                tool_content = types.Content(role="tool", parts=function_responses)
+                messages.append(tool_content)
+                # The calls are saved only together with their results, so memory.db never
+                # ends a run on a function call that has no answer.
+                for candidate in response.candidates:
+                    save_content(candidate.content, candidate.content.parts[0].text)
+                save_content(tool_content, ", ".join(part.function_response.name for part in function_responses))
+                elided_chars = compact_history(messages, TOOL_OUTPUT_HISTORY)
+
+                if verbose:
+                    saved = raw_chars - shaped_chars + elided_chars
+                    print(
+                        f"Tool output: {raw_chars} -> {shaped_chars} chars, "
+                        f"{elided_chars} chars of old outputs digested (~{estimate_tokens(saved)} tokens saved)"
+                    )
+
+            except Exception as e:
+                print(f"Error during generation: {e}")
+                print("Progress is saved, run again with --resume to continue from the last completed iteration.")
+                break
+        else:
+            print(f"\nReached maximum iterations ({MAX_ITERATIONS}). Agent may not have completed its task.")
+    finally:
+        call_model.close()
+
+
+def drop_unanswered_calls(messages):
+    # Every model turn with function calls must be followed by their results. A run that
+    # died in between (or a database written before calls and results were saved together)
+    # leaves such a turn behind, possibly with later turns after it; drop it so the
+    # history is valid again and the model is simply asked again.
+    messages[:] = [
+        message
+        for i, message in enumerate(messages)
+        if not (
+            message.role == "model"
+            and any(part.function_call for part in message.parts or [])
+            and (i + 1 == len(messages) or messages[i + 1].role != "tool")
+        )
+    ]
+
+
+def can_resume(messages):
+    # Only a run that stopped waiting for the model (after the prompt or after tool
+    # results) has something left to do; a final model answer means it finished.
+    return bool(messages) and messages[-1].role in ("user", "tool")
 
 
 if __name__ == "__main__":
@@ -1,8 +1,12 @@
 import sqlite3
-from google.genai import types
+import time
+from metrics import REGISTRY
 
 DB_FILE = "memory.db"
 
+memory_write_seconds = REGISTRY.histogram("agent_memory_write_seconds", "Time to persist one message to memory.db.")
+memory_lock_errors = REGISTRY.counter("agent_memory_lock_errors_total", "Writes that gave up waiting for the memory.db lock.")
+
 def init_db():
     conn = sqlite3.connect(DB_FILE)
     c = conn.cursor()
@@ -10,28 +14,52 @@ def init_db():
         CREATE TABLE IF NOT EXISTS memory (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             role TEXT,
-            content TEXT
+            content TEXT,
+            payload TEXT
         )
     """)
+    # Databases created before payloads were stored get the column added.
+    columns = [row[1] for row in c.execute("PRAGMA table_info(memory)")]
+    if "payload" not in columns:
+        c.execute("ALTER TABLE memory ADD COLUMN payload TEXT")
     conn.commit()
     conn.close()
 
-def save_message(role, content):
+def save_message(role, content, payload=None):
+    started = time.perf_counter()
     conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("INSERT INTO memory (role, content) VALUES (?, ?)", (role, content))
-    conn.commit()
-    conn.close()
+    try:
+        c = conn.cursor()
+        c.execute("INSERT INTO memory (role, content, payload) VALUES (?, ?, ?)", (role, content, payload))
+        conn.commit()
+    except sqlite3.OperationalError as e:
+        # Another writer held the lock for longer than sqlite3's busy timeout.
+        if "locked" in str(e):
+            memory_lock_errors.inc()
+        raise
+    finally:
+        conn.close()
+    memory_write_seconds.observe(time.perf_counter() - started)
+
+def save_content(content, text=None):
+    # Stores the full Content (function calls and responses included) so a run can be resumed exactly.
+    save_message(content.role, text, content.model_dump_json(exclude_none=True))
 
 def load_messages():
+    # Imported here so importing memory does not pull in the SDK.
+    from google.genai import types
+
     conn = sqlite3.connect(DB_FILE)
     c = conn.cursor()
-    c.execute("SELECT role, content FROM memory ORDER BY id ASC")
+    c.execute("SELECT role, content, payload FROM memory ORDER BY id ASC")
     rows = c.fetchall()
     messages = []
-    for role, content in rows:
-        messages.append(
-            types.Content(role=role, parts=[types.Part(text=content)])
-        )
+    for role, content, payload in rows:
+        if payload:
+            messages.append(types.Content.model_validate_json(payload))
+        else:
+            messages.append(
+                types.Content(role=role, parts=[types.Part(text=content)])
+            )
     conn.close()
     return messages
@@ -0,0 +1,175 @@
+import fnmatch
+import os
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+
+from config import PREFETCH_BUDGET_BYTES, PREFETCH_EXTENSIONS, PREFETCH_IGNORE, PREFETCH_MAX_FILE_BYTES
+from metrics import REGISTRY
+
+_hits = REGISTRY.counter("agent_file_cache_hits_total", "File reads answered from the session cache.")
+_misses = REGISTRY.counter("agent_file_cache_misses_total", "File reads that had to go to disk.")
+_prefetched_bytes = REGISTRY.counter("agent_prefetch_bytes_total", "Bytes read ahead after directory listings.")
+
+
+class FileCache:
+    """
+    Session cache of get_file_content results, keyed by absolute path.
+
+    Every entry remembers the file's mtime and size from before it was read and is
+    only served while the file still matches, so edits made by run_python_file or
+    by hand are picked up. Entries may still be loading in the background; a read
+    of such a file waits for that load instead of starting a second one.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def read(self, working_directory, reader, file_path):
+        """Return reader(working_directory, file_path), from the cache when the file is unchanged."""
+        path = os.path.abspath(os.path.join(working_directory, file_path))
+        with self._lock:
+            future = self._entries.get(path)
+        if future is not None and future.exception() is None:
+            stamp, content = future.result()
+            if stamp is not None and stamp == _stamp(path):
+                _hits.inc()
+                return content
+        _misses.inc()
+        future = self._load(path, working_directory, reader, file_path)
+        return future.result()[1]
+
+    def prefetch(self, executor, working_directory, reader, file_path):
+        """Start loading file_path on executor unless it is cached or already loading."""
+        path = os.path.abspath(os.path.join(working_directory, file_path))
+        with self._lock:
+            if path in self._entries:
+                return False
+            future = self._entries[path] = Future()
+        try:
+            job = executor.submit(_fill, future, path, working_directory, reader, file_path)
+        except RuntimeError:
+            # The executor is shut down: forget the entry, a read loads the file itself.
+            with self._lock:
+                if self._entries.get(path) is future:
+                    del self._entries[path]
+            return False
+        job.add_done_callback(lambda job: _fail_if_cancelled(job, future))
+        return True
+
+    def invalidate(self, working_directory, file_path):
+        path = os.path.abspath(os.path.join(working_directory, file_path))
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _load(self, path, working_directory, reader, file_path):
+        future = Future()
+        _fill(future, path, working_directory, reader, file_path)
+        with self._lock:
+            self._entries[path] = future
+        return future
+
+
+class Prefetcher:
+    """
+    Reads small text files in the background right after a directory listing, so
+    the get_file_content calls that usually follow are answered from the cache.
+    The whole session reads ahead at most budget bytes; files larger than
+    max_file_bytes, with other extensions or matching an ignore pattern are skipped.
+    """
+
+    def __init__(
+        self,
+        cache,
+        reader,
+        budget=PREFETCH_BUDGET_BYTES,
+        max_file_bytes=PREFETCH_MAX_FILE_BYTES,
+        extensions=PREFETCH_EXTENSIONS,
+        ignore=PREFETCH_IGNORE,
+        workers=4,
+    ):
+        self.cache = cache
+        self.reader = reader
+        self.budget = budget
+        self.max_file_bytes = max_file_bytes
+        self.extensions = frozenset(extensions)
+        self.ignore = tuple(ignore)
+        self.used = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+
+    def after_listing(self, working_directory, directory="."):
+        """Queue the listed files worth reading ahead; returns how many were queued."""
+        if self.used >= self.budget:
+            return 0
+        abs_working_directory = os.path.abspath(working_directory)
+        abs_directory = os.path.abspath(os.path.join(working_directory, directory or "."))
+        try:
+            entries = sorted(os.scandir(abs_directory), key=lambda entry: entry.name)
+        except OSError:
+            return 0
+
+        queued = 0
+        for entry in entries:
+            size = self._wanted(entry, abs_working_directory)
+            if size is None or self.used + size > self.budget:
+                continue
+            relative = os.path.relpath(entry.path, abs_working_directory)
+            if self.cache.prefetch(self._executor, working_directory, self.reader, relative):
+                self.used += size
+                _prefetched_bytes.inc(size)
+                queued += 1
+        return queued
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _wanted(self, entry, abs_working_directory):
+        # The size of a file worth prefetching, None for anything else.
+        if self._ignored(os.path.relpath(entry.path, abs_working_directory)):
+            return None
+        if os.path.splitext(entry.name)[1].lower() not in self.extensions:
+            return None
+        try:
+            if not entry.is_file():
+                return None
+            size = entry.stat().st_size
+        except OSError:
+            return None
+        return size if size <= self.max_file_bytes else None
+
+    def _ignored(self, relative):
+        parts = relative.split(os.sep)
+        return any(fnmatch.fnmatch(part, pattern) for part in parts for pattern in self.ignore)
+
+
+def _stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _fill(future, path, working_directory, reader, file_path):
+    # The stamp is taken before reading: a file changed mid-read no longer matches it.
+    stamp = _stamp(path)
+    try:
+        content = reader(working_directory, file_path)
+    except Exception as e:
+        future.set_exception(e)
+        return
+    # Errors ("Error: ...", "Exception reading file ...") are returned but never served from the cache.
+    if content.startswith(("Error", "Exception")):
+        stamp = None
+    future.set_result((stamp, content))
+
+
+def _fail_if_cancelled(job, future):
+    # A job cancelled before it ran (Prefetcher.close) never calls _fill. Failing its
+    # entry makes reads of that file load it themselves instead of waiting forever.
+    if job.cancelled():
+        future.set_exception(CancelledError("prefetch cancelled"))
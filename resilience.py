@@ -0,0 +1,142 @@
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# HTTP status codes worth another attempt: timeouts, rate limits and server hiccups.
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+RETRYABLE = "retryable"
+FATAL = "fatal"
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def classify_error(error):
+    """
+    Sort an exception from a model call into RETRYABLE or FATAL.
+    API errors (google.genai.errors.APIError and anything else carrying an HTTP
+    `code`) are judged by status; connection problems and timeouts are retryable;
+    everything else (bad request, auth, programming errors) is fatal.
+    """
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return RETRYABLE if code in RETRYABLE_STATUS else FATAL
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return RETRYABLE
+    try:
+        import httpx
+    except ImportError:
+        return FATAL
+    if isinstance(error, httpx.TransportError):
+        return RETRYABLE
+    return FATAL
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter: attempt n sleeps uniform(0, min(max_delay, base_delay * 2**n))."""
+
+    def __init__(self, max_attempts=5, base_delay=0.5, max_delay=20.0, rng=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = rng or random.Random()
+
+    def delay(self, attempt):
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class ResilientCaller:
+    """
+    Wraps a blocking call (the model's generate_content) with retries, a deadline
+    shared by every call of the session, and optional hedging: when the first
+    request has not answered after the p95 of recent latencies, a second identical
+    request is sent and whichever finishes first wins.
+
+    latency is a metrics.Histogram; it provides the hedge threshold and is fed
+    with every successful call.
+    """
+
+    def __init__(self, func, policy=None, deadline=None, hedge=False, latency=None, min_samples=20, sleep=time.sleep):
+        self.func = func
+        self.policy = policy or RetryPolicy()
+        self.deadline_at = time.monotonic() + deadline if deadline is not None else None
+        self.hedge = hedge
+        self.latency = latency
+        self.min_samples = min_samples
+        self.sleep = sleep
+        self.attempts = 0
+        self.hedged = 0
+        # Losing hedged requests finish in the background; two threads per live request is enough.
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="model-call")
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        attempt = 0
+        while True:
+            self._check_deadline()
+            try:
+                return self._call_once(args, kwargs)
+            except DeadlineExceeded:
+                raise
+            except Exception as error:
+                attempt += 1
+                if classify_error(error) == FATAL or attempt >= self.policy.max_attempts:
+                    raise
+                delay = self.policy.delay(attempt)
+                remaining = self._remaining()
+                if remaining is not None and delay >= remaining:
+                    raise DeadlineExceeded(f"no time left to retry after: {error}") from error
+                self.sleep(delay)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _call_once(self, args, kwargs):
+        started = time.perf_counter()
+        with self._lock:
+            self.attempts += 1
+        futures = [self._executor.submit(self.func, *args, **kwargs)]
+
+        hedge_after = self._hedge_threshold()
+        if hedge_after is not None:
+            done, _ = wait(futures, timeout=self._bounded(hedge_after))
+            if not done:
+                self._check_deadline()
+                with self._lock:
+                    self.hedged += 1
+                futures.append(self._executor.submit(self.func, *args, **kwargs))
+
+        first_error = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=self._remaining(), return_when=FIRST_COMPLETED)
+            if not done:
+                raise DeadlineExceeded("model call did not finish before the session deadline")
+            for future in done:
+                if future.exception() is None:
+                    if self.latency is not None:
+                        self.latency.observe(time.perf_counter() - started)
+                    return future.result()
+                first_error = first_error or future.exception()
+        raise first_error
+
+    def _hedge_threshold(self):
+        if not self.hedge or self.latency is None or self.latency.count < self.min_samples:
+            return None
+        return self.latency.quantile(0.95)
+
+    def _remaining(self):
+        if self.deadline_at is None:
+            return None
+        return max(0.0, self.deadline_at - time.monotonic())
+
+    def _bounded(self, timeout):
+        remaining = self._remaining()
+        return timeout if remaining is None else min(timeout, remaining)
+
+    def _check_deadline(self):
+        if self.deadline_at is not None and time.monotonic() >= self.deadline_at:
+            raise DeadlineExceeded("session deadline reached")
@@ -0,0 +1,543 @@
+# tests.py
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from google import genai
+from google.genai import types
+
+import call_functions
+import memory
+from fake_gemini_server import FakeGemini, make_server
+from functions.get_file_content import get_file_content
+from functions.get_files_info import get_files_info
+from functions.run_python_file import run_python_file
+from functions.run_tests import _discover_test_files, run_tests
+from main import can_resume, drop_unanswered_calls, generate_content
+from metrics import Histogram, Registry
+from prefetch import FileCache, Prefetcher
+from resilience import FATAL, RETRYABLE, DeadlineExceeded, ResilientCaller, RetryPolicy, classify_error
+from tool_results import DIGEST_KEY, compact_history, shape_result
+
+
+class HTTPError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+class FixedRandom:
+    # Stands in for random.Random in RetryPolicy: every delay is the upper bound.
+    def uniform(self, low, high):
+        return high
+
+
+def flaky(failures, code=503, result="ok"):
+    """A callable that raises HTTPError(code) `failures` times, then returns result."""
+    calls = []
+
+    def call():
+        calls.append(time.monotonic())
+        if len(calls) <= failures:
+            raise HTTPError(code)
+        return result
+
+    return call, calls
+
+
+class TestResilience(unittest.TestCase):
+    def test_classify_error(self):
+        for code in (408, 429, 500, 502, 503, 504):
+            self.assertEqual(classify_error(HTTPError(code)), RETRYABLE)
+        for code in (400, 401, 403, 404):
+            self.assertEqual(classify_error(HTTPError(code)), FATAL)
+        self.assertEqual(classify_error(ConnectionResetError()), RETRYABLE)
+        self.assertEqual(classify_error(TimeoutError()), RETRYABLE)
+        self.assertEqual(classify_error(ValueError("bad")), FATAL)
+
+    def test_retries_transient_errors_with_backoff(self):
+        sleeps = []
+        func, calls = flaky(2)
+        caller = ResilientCaller(func, RetryPolicy(max_attempts=5, base_delay=0.5, rng=FixedRandom()), sleep=sleeps.append)
+        try:
+            self.assertEqual(caller(), "ok")
+        finally:
+            caller.close()
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(caller.attempts, 3)
+        # Attempt n waits base_delay * 2**n with the jitter at its maximum.
+        self.assertEqual(sleeps, [1.0, 2.0])
+
+    def test_fatal_errors_are_not_retried(self):
+        func, calls = flaky(1, code=400)
+        caller = ResilientCaller(func, RetryPolicy(max_attempts=5), sleep=lambda s: None)
+        try:
+            with self.assertRaises(HTTPError):
+                caller()
+        finally:
+            caller.close()
+        self.assertEqual(len(calls), 1)
+
+    def test_gives_up_after_max_attempts(self):
+        func, calls = flaky(10)
+        caller = ResilientCaller(func, RetryPolicy(max_attempts=3), sleep=lambda s: None)
+        try:
+            with self.assertRaises(HTTPError):
+                caller()
+        finally:
+            caller.close()
+        self.assertEqual(len(calls), 3)
+
+    def test_backoff_stays_inside_the_deadline(self):
+        func, calls = flaky(10)
+        policy = RetryPolicy(max_attempts=10, base_delay=5.0, max_delay=5.0, rng=FixedRandom())
+        caller = ResilientCaller(func, policy, deadline=1.0, sleep=lambda s: self.fail("slept past the deadline"))
+        try:
+            with self.assertRaises(DeadlineExceeded) as raised:
+                caller()
+        finally:
+            caller.close()
+        self.assertEqual(len(calls), 1)
+        self.assertIsInstance(raised.exception.__cause__, HTTPError)
+
+    def test_slow_call_hits_the_deadline(self):
+        caller = ResilientCaller(lambda: time.sleep(1.0), deadline=0.1)
+        started = time.monotonic()
+        try:
+            with self.assertRaises(DeadlineExceeded):
+                caller()
+        finally:
+            caller.close()
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_hedges_slow_calls_after_p95(self):
+        latency = Histogram("test_seconds", {})
+        for _ in range(20):
+            latency.observe(0.01)
+        calls = []
+        lock = threading.Lock()
+
+        def call():
+            with lock:
+                calls.append(None)
+                first = len(calls) == 1
+            # The first request is stuck in the tail; the hedged one answers quickly.
+            time.sleep(2.0 if first else 0.01)
+            return "first" if first else "hedge"
+
+        caller = ResilientCaller(call, hedge=True, latency=latency)
+        started = time.monotonic()
+        try:
+            self.assertEqual(caller(), "hedge")
+        finally:
+            caller.close()
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(caller.hedged, 1)
+        self.assertEqual(len(calls), 2)
+
+    def test_no_hedging_before_enough_samples(self):
+        latency = Histogram("test_seconds", {})
+        caller = ResilientCaller(lambda: "ok", hedge=True, latency=latency)
+        try:
+            self.assertEqual(caller(), "ok")
+        finally:
+            caller.close()
+        self.assertEqual(caller.hedged, 0)
+        self.assertEqual(latency.count, 1)
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = Registry()
+        self.histogram = self.registry.histogram("latency_seconds", "Latency.", {"tool": 'a"b\\c\nd'}, buckets=(1.0, 2.0, 4.0))
+        # 1.0 lands in the le="1.0" bucket (upper bounds are inclusive), 10.0 in +Inf.
+        for value in (0.5, 1.0, 1.5, 3.0, 10.0):
+            self.histogram.observe(value)
+
+    def test_buckets(self):
+        self.assertEqual(self.histogram.counts, [2, 1, 1, 1])
+        self.assertEqual(self.histogram.count, 5)
+        self.assertEqual(self.histogram.sum, 16.0)
+
+    def test_quantile_interpolates_inside_the_bucket(self):
+        self.assertEqual(self.histogram.quantile(0.2), 0.5)
+        self.assertEqual(self.histogram.quantile(0.5), 1.5)
+        self.assertEqual(self.histogram.quantile(0.7), 3.0)
+        # Nothing is known above the last bound, so the +Inf bucket reports that bound.
+        self.assertEqual(self.histogram.quantile(1.0), 4.0)
+        self.assertIsNone(Histogram("empty", {}).quantile(0.5))
+
+    def test_prometheus_output(self):
+        self.registry.counter("calls_total", "Calls.").inc(3)
+        self.assertEqual(self.registry.to_prometheus().splitlines(), [
+            "# HELP calls_total Calls.",
+            "# TYPE calls_total counter",
+            "calls_total 3.0",
+            "# HELP latency_seconds Latency.",
+            "# TYPE latency_seconds histogram",
+            'latency_seconds_bucket{tool="a\\"b\\\\c\\nd",le="1.0"} 2',
+            'latency_seconds_bucket{tool="a\\"b\\\\c\\nd",le="2.0"} 3',
+            'latency_seconds_bucket{tool="a\\"b\\\\c\\nd",le="4.0"} 4',
+            'latency_seconds_bucket{tool="a\\"b\\\\c\\nd",le="+Inf"} 5',
+            'latency_seconds_sum{tool="a\\"b\\\\c\\nd"} 16.0',
+            'latency_seconds_count{tool="a\\"b\\\\c\\nd"} 5',
+        ])
+
+    def test_json_output(self):
+        (entry,) = json.loads(self.registry.to_json())["latency_seconds"]
+        self.assertEqual(entry["type"], "histogram")
+        self.assertEqual(entry["labels"], {"tool": 'a"b\\c\nd'})
+        self.assertEqual(entry["buckets"], {"1.0": 2, "2.0": 1, "4.0": 1, "+Inf": 1})
+        self.assertEqual((entry["count"], entry["sum"], entry["p50"]), (5, 16.0, 1.5))
+
+
+class TestFakeGeminiServer(unittest.TestCase):
+    def setUp(self):
+        # With seed 4 the first two requests fail with 429/503.
+        self.fake = FakeGemini(latency=0.0, failure_rate=0.5, seed=4)
+        self.server = make_server(self.fake, port=0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.client = genai.Client(api_key="fake", http_options=types.HttpOptions(base_url=base_url))
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def generate(self, caller):
+        try:
+            return caller(model="gemini-2.0-flash", contents=[types.Content(role="user", parts=[types.Part(text="hi")])])
+        finally:
+            caller.close()
+
+    def test_injected_failures_are_retried(self):
+        caller = ResilientCaller(self.client.models.generate_content, RetryPolicy(max_attempts=20, base_delay=0.001), sleep=lambda s: None)
+        response = self.generate(caller)
+        self.assertEqual(response.text, "fake answer after 1 messages")
+        self.assertEqual(self.fake.failures, 2)
+        self.assertEqual(caller.attempts, self.fake.requests)
+
+    def test_persistent_failures_surface_the_api_error(self):
+        self.fake.failure_rate = 1.0
+        caller = ResilientCaller(self.client.models.generate_content, RetryPolicy(max_attempts=2, base_delay=0.001), sleep=lambda s: None)
+        with self.assertRaises(Exception) as raised:
+            self.generate(caller)
+        self.assertIn(raised.exception.code, (429, 503))
+        self.assertEqual(self.fake.requests, 2)
+
+
+def text(role, value):
+    return types.Content(role=role, parts=[types.Part(text=value)])
+
+
+def call(name):
+    return types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(name=name, args={}))])
+
+
+def result(name):
+    return types.Content(role="tool", parts=[types.Part.from_function_response(name=name, response={"result": "x"})])
+
+
+class TestResume(unittest.TestCase):
+    def test_drops_calls_that_never_got_results(self):
+        messages = [text("user", "hi"), call("get_files_info"), result("get_files_info"), call("get_file_content")]
+        drop_unanswered_calls(messages)
+        self.assertEqual([m.role for m in messages], ["user", "model", "tool"])
+        self.assertTrue(can_resume(messages))
+
+    def test_interrupted_after_the_prompt_can_resume(self):
+        messages = [text("user", "hi"), call("get_files_info")]
+        drop_unanswered_calls(messages)
+        self.assertTrue(can_resume(messages))
+
+    def test_drops_dangling_calls_before_later_turns(self):
+        # An older database can hold a call with no results followed by the next run's prompt.
+        messages = [text("user", "hi"), call("get_files_info"), text("user", "again")]
+        drop_unanswered_calls(messages)
+        self.assertEqual([m.role for m in messages], ["user", "user"])
+
+    def test_failed_tool_call_leaves_no_dangling_call_in_memory(self):
+        class Models:
+            def generate_content(self, model, contents, config=None):
+                # Arguments get_files_info does not take: the tool call raises TypeError.
+                part = types.Part(function_call=types.FunctionCall(name="get_files_info", args={"bogus": 1}))
+                return types.GenerateContentResponse(candidates=[types.Candidate(content=types.Content(role="model", parts=[part]))])
+
+        class Client:
+            models = Models()
+
+        with tempfile.TemporaryDirectory() as directory:
+            previous = memory.DB_FILE
+            memory.DB_FILE = os.path.join(directory, "memory.db")
+            try:
+                memory.init_db()
+                memory.save_message("user", "hi")
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output):
+                    generate_content(Client(), [text("user", "hi")], None, verbose=False)
+                self.assertIn("Error during generation", output.getvalue())
+                self.assertEqual([m.role for m in memory.load_messages()], ["user"])
+            finally:
+                memory.DB_FILE = previous
+
+    def test_finished_run_is_not_resumed(self):
+        messages = [text("user", "hi"), call("get_files_info"), result("get_files_info"), text("model", "done")]
+        drop_unanswered_calls(messages)
+        self.assertFalse(can_resume(messages))
+        self.assertFalse(can_resume([]))
+
+
+
+class TestToolResults(unittest.TestCase):
+    # The shapers parse other tools' output formats; these run the real tools so a
+    # format change shows up here instead of silently turning shaping off.
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, text):
+        with open(os.path.join(self.root, name), "w") as f:
+            f.write(text)
+
+    def test_shapes_files_info(self):
+        self.write("a.py", "x = 1\n")
+        os.mkdir(os.path.join(self.root, "sub"))
+        shaped = shape_result("get_files_info", get_files_info(self.root), self.root)
+        lines = shaped.splitlines()
+        self.assertEqual(lines[0], "path size (dirs end with /)")
+        self.assertEqual(sorted(lines[1:]), ["a.py 6", "sub/"])
+
+    def test_shapes_run_output(self):
+        self.write("fails.py", "import sys\nprint('hi')\nprint('warn', file=sys.stderr)\nsys.exit(2)\n")
+        self.write("quiet.py", "print('only stdout')\n")
+        shaped = shape_result("run_python_file", run_python_file(self.root, "fails.py"), self.root)
+        self.assertEqual(shaped, "stdout:\nhi\nstderr:\nwarn\nexit code 2")
+        shaped = shape_result("run_python_file", run_python_file(self.root, "quiet.py"), self.root)
+        self.assertEqual(shaped, "stdout:\nonly stdout")
+
+    def test_unrecognised_output_is_passed_through(self):
+        self.assertEqual(shape_result("get_files_info", "Error: nope", self.root), "Error: nope")
+        self.assertEqual(shape_result("run_python_file", "No output produced.", self.root), "No output produced.")
+
+    def test_compact_history_keeps_the_last_turns(self):
+        outputs = ["first output\n" * 20, "second output\n" * 20, "third output\n" * 20]
+        messages = [text("user", "hi")]
+        for output in outputs:
+            messages.append(call("get_file_content"))
+            messages.append(types.Content(role="tool", parts=[
+                types.Part.from_function_response(name="get_file_content", response={"result": output}),
+            ]))
+        saved = compact_history(messages, keep=1)
+        responses = [m.parts[0].function_response.response for m in messages if m.role == "tool"]
+        self.assertEqual([DIGEST_KEY in response for response in responses], [True, True, False])
+        self.assertEqual(responses[2]["result"], outputs[2])
+        self.assertIn("first output", responses[0][DIGEST_KEY])
+        self.assertEqual(saved, sum(len(outputs[i]) - len(responses[i][DIGEST_KEY]) for i in (0, 1)))
+        # Digested turns are not digested again; keep=0 digests the rest.
+        self.assertEqual(compact_history(messages, keep=1), 0)
+        self.assertGreater(compact_history(messages, keep=0), 0)
+        self.assertTrue(all(DIGEST_KEY in m.parts[0].function_response.response for m in messages if m.role == "tool"))
+
+
+class TestFileCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        self.cache = FileCache()
+        self.reads = []
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, text):
+        with open(os.path.join(self.root, name), "w") as f:
+            f.write(text)
+
+    def reader(self, working_directory, file_path):
+        self.reads.append(file_path)
+        return get_file_content(working_directory, file_path)
+
+    def read(self, name):
+        return self.cache.read(self.root, self.reader, name)
+
+    def test_unchanged_file_is_served_from_cache(self):
+        self.write("a.py", "x = 1\n")
+        self.assertEqual(self.read("a.py"), "x = 1\n")
+        self.assertEqual(self.read("a.py"), "x = 1\n")
+        self.assertEqual(self.reads, ["a.py"])
+
+    def test_changed_size_is_read_again(self):
+        self.write("a.py", "x = 1\n")
+        self.read("a.py")
+        self.write("a.py", "x = 100\n")
+        self.assertEqual(self.read("a.py"), "x = 100\n")
+        self.assertEqual(len(self.reads), 2)
+
+    def test_changed_mtime_with_same_size_is_read_again(self):
+        path = os.path.join(self.root, "a.py")
+        self.write("a.py", "x = 1\n")
+        self.read("a.py")
+        self.write("a.py", "x = 2\n")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertEqual(self.read("a.py"), "x = 2\n")
+        self.assertEqual(len(self.reads), 2)
+
+    def test_errors_are_never_served(self):
+        self.assertTrue(self.read("missing.py").startswith("Error"))
+        self.write("missing.py", "found\n")
+        self.assertEqual(self.read("missing.py"), "found\n")
+        self.assertEqual(len(self.reads), 2)
+
+    def test_invalidate(self):
+        self.write("a.py", "x = 1\n")
+        self.read("a.py")
+        self.cache.invalidate(self.root, "a.py")
+        self.read("a.py")
+        self.assertEqual(len(self.reads), 2)
+
+    def test_read_waits_for_load_in_flight(self):
+        self.write("a.py", "x = 1\n")
+        release = threading.Event()
+
+        def slow_reader(working_directory, file_path):
+            release.wait(5)
+            return self.reader(working_directory, file_path)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            self.assertTrue(self.cache.prefetch(executor, self.root, slow_reader, "a.py"))
+            self.assertFalse(self.cache.prefetch(executor, self.root, slow_reader, "a.py"))
+            reading = executor.submit(self.read, "a.py")
+            time.sleep(0.05)
+            self.assertFalse(reading.done())
+            release.set()
+            self.assertEqual(reading.result(5), "x = 1\n")
+        self.assertEqual(self.reads, ["a.py"])
+
+    def test_reads_after_close_do_not_wait_for_cancelled_prefetches(self):
+        for i in range(50):
+            self.write(f"f{i}.py", "x\n")
+        release = threading.Event()
+
+        def slow_reader(working_directory, file_path):
+            release.wait(5)
+            return self.reader(working_directory, file_path)
+
+        prefetcher = Prefetcher(self.cache, slow_reader, workers=1)
+        self.assertEqual(prefetcher.after_listing(self.root), 50)
+        prefetcher.close()
+        release.set()
+        reading = ThreadPoolExecutor(max_workers=1)
+        try:
+            self.assertEqual(reading.submit(self.read, "f40.py").result(5), "x\n")
+        finally:
+            reading.shutdown(wait=False)
+        # Prefetching after close queues nothing and leaves no entry behind.
+        self.write("late.py", "y\n")
+        self.assertFalse(self.cache.prefetch(prefetcher._executor, self.root, slow_reader, "late.py"))
+        self.assertEqual(self.read("late.py"), "y\n")
+
+    def test_prefetch_filters_and_budget(self):
+        self.write("a.py", "a" * 10)
+        self.write("b.md", "b" * 10)
+        self.write("big.py", "c" * 100)
+        self.write("data.bin", "d")
+        self.write(".env", "SECRET=1")
+        prefetcher = Prefetcher(self.cache, self.reader, budget=15, max_file_bytes=50)
+        try:
+            self.assertEqual(prefetcher.after_listing(self.root), 1)
+        finally:
+            prefetcher.close()
+        # a.py fits; b.md would go over the budget; the rest are filtered out.
+        self.assertEqual(prefetcher.used, 10)
+
+
+class TestRunTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        self.write("helper.py", "def double(x):\n    return 2 * x\n")
+        self.write("test_helper.py", (
+            "import unittest\n"
+            "from helper import double\n\n"
+            "class TestDouble(unittest.TestCase):\n"
+            "    def test_double(self):\n"
+            "        self.assertEqual(double(2), 4)\n"
+        ))
+        self.write("other_test.py", "def test_alone():\n    assert 1 + 1 == 2\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def test_discovery(self):
+        self.write("test_script.py", "print('not a test module')\n")
+        self.write("tests.py", "class TestNothing:\n    pass\n")
+        self.write(".hidden/test_hidden.py", "def test_hidden():\n    pass\n")
+        self.write("pkg/test_nested.py", "def test_nested():\n    pass\n")
+        found = [os.path.relpath(path, self.root) for path in _discover_test_files(self.root)]
+        # Files that only look like tests, and hidden folders, are left out; folders come after files.
+        self.assertEqual(found, ["other_test.py", "test_helper.py", "tests.py", os.path.join("pkg", "test_nested.py")])
+
+    def test_only_affected_files_run_again(self):
+        self.assertTrue(run_tests(self.root).startswith("2 passed, 0 failed, 0 errors, 0 skipped in 2 files (0 unchanged"))
+        self.assertTrue(run_tests(self.root).startswith("0 passed, 0 failed, 0 errors, 0 skipped in 0 files (2 unchanged"))
+        # helper.py is imported by test_helper.py only.
+        self.write("helper.py", "def double(x):\n    return x + x + 1\n")
+        summary = run_tests(self.root)
+        self.assertTrue(summary.startswith("0 passed, 1 failed, 0 errors, 0 skipped in 1 files (1 unchanged"), summary)
+        self.assertIn("FAILED test_helper.py::TestDouble.test_double: AssertionError: 5 != 4", summary)
+        # A failing file runs again even though nothing changed.
+        self.assertIn("in 1 files (1 unchanged", run_tests(self.root))
+        self.assertIn("in 2 files (0 unchanged", run_tests(self.root, run_all=True))
+
+    def test_worker_crash_is_reported(self):
+        self.write("test_crash.py", "import os\nos._exit(3)\n\ndef test_never_runs():\n    pass\n")
+        summary = run_tests(self.root)
+        self.assertIn("1 errors", summary)
+        self.assertIn("ERROR test_crash.py::<module>: process exited with code 3", summary)
+
+
+class TestToolCacheInvalidation(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.previous = call_functions.working_directory
+        call_functions.working_directory = self.directory.name
+        call_functions.file_cache.clear()
+
+    def tearDown(self):
+        call_functions.working_directory = self.previous
+        call_functions.file_cache.clear()
+        self.directory.cleanup()
+
+    def run_tool(self, name, **args):
+        return call_functions._run_tool(name, call_functions.load_tool(name), args)
+
+    def test_write_and_delete_file_invalidate(self):
+        path = os.path.join(self.directory.name, "a.txt")
+        self.run_tool("write_file", file_path="a.txt", content="one")
+        stat = os.stat(path)
+        self.assertEqual(self.run_tool("get_file_content", file_path="a.txt"), "one")
+        # Same size and, on coarse filesystem clocks, the same mtime: only invalidation tells the cache.
+        self.run_tool("write_file", file_path="a.txt", content="two")
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(self.run_tool("get_file_content", file_path="a.txt"), "two")
+        self.run_tool("delete_file", file_path="a.txt")
+        self.assertTrue(self.run_tool("get_file_content", file_path="a.txt").startswith("Error"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import hashlib
+import os
+import re
+from google.genai import types
+
+# Upper bound on the characters one tool result may put into the prompt.
+TOOL_CAPS = {
+    "get_files_info": 4000,
+    "get_file_content": 10000,
+    # MAX_MANY_CHARS plus room for the per-file headers.
+    "get_many_file_contents": 42000,
+    "run_python_file": 4000,
+    "run_tests": 3000,
+}
+DEFAULT_CAP = 2000
+
+# Rough chars-per-token ratio, only used to report savings.
+CHARS_PER_TOKEN = 4
+
+_FILES_INFO_LINE = re.compile(r"^ -(?P<path>.*) : file_size=(?P<size>\d+) bytes , is_dir = (?P<is_dir>True|False)$")
+_RUN_OUTPUT = re.compile(r"^\nSTDOUT:(?P<stdout>.*)\nSTDERR:(?P<stderr>.*)\n    (?:process exited with code (?P<code>-?\d+))?$", re.S)
+
+DIGEST_KEY = "digest"
+
+
+def shape_result(name, result, working_directory="."):
+    """
+    Re-encode one tool result for the prompt: relative paths, a compact table for
+    listings, no padding around program output, and a per-tool size cap.
+    Anything a shaper does not recognise (errors, unknown formats) is passed through.
+    """
+    shaper = _SHAPERS.get(name)
+    if shaper is not None:
+        result = shaper(result, os.path.abspath(working_directory))
+    return _cap(result, TOOL_CAPS.get(name, DEFAULT_CAP))
+
+
+def shape_part(part, working_directory="."):
+    """Shape a function-response Part. Returns (new part, raw chars, shaped chars)."""
+    response = part.function_response.response or {}
+    if "result" not in response or not isinstance(response["result"], str):
+        return part, 0, 0
+    raw = response["result"]
+    shaped = shape_result(part.function_response.name, raw, working_directory)
+    new_part = types.Part.from_function_response(name=part.function_response.name, response={"result": shaped})
+    return new_part, len(raw), len(shaped)
+
+
+def compact_history(messages, keep):
+    """
+    Replace the tool outputs of all but the last `keep` tool turns with a short digest.
+    The model keeps the knowledge that a call happened and how big its output was,
+    and can simply call the tool again when it needs the content. Returns chars saved.
+    """
+    tool_turns = [message for message in messages if message.role == "tool" and _has_results(message)]
+    saved = 0
+    for message in tool_turns[:-keep] if keep else tool_turns:
+        parts = []
+        for part in message.parts:
+            response = part.function_response.response if part.function_response else None
+            if response and isinstance(response.get("result"), str):
+                digest = _digest(part.function_response.name, response["result"])
+                saved += len(response["result"]) - len(digest)
+                part = types.Part.from_function_response(name=part.function_response.name, response={DIGEST_KEY: digest})
+            parts.append(part)
+        message.parts = parts
+    return saved
+
+
+def estimate_tokens(chars):
+    return chars // CHARS_PER_TOKEN
+
+
+def _has_results(message):
+    return any(
+        part.function_response and part.function_response.response and "result" in part.function_response.response
+        for part in message.parts or []
+    )
+
+
+def _digest(name, text):
+    first_line = text.strip().splitlines()[0][:80] if text.strip() else ""
+    checksum = hashlib.sha1(text.encode()).hexdigest()[:8]
+    return f"[{name} output elided: {len(text)} chars, sha1 {checksum}; first line: {first_line!r}. Call the tool again if needed.]"
+
+
+def _cap(text, limit):
+    # Keep the head and the tail: errors and summaries tend to sit at the end.
+    if len(text) <= limit:
+        return text
+    head = limit * 2 // 3
+    tail = limit - head
+    return f"{text[:head]}\n[... {len(text) - limit} chars omitted ...]\n{text[-tail:]}"
+
+
+def _shape_files_info(result, abs_working_directory):
+    rows = []
+    for line in result.splitlines():
+        match = _FILES_INFO_LINE.match(line)
+        if match is None:
+            return result
+        path = os.path.relpath(match.group("path"), abs_working_directory)
+        if match.group("is_dir") == "True":
+            rows.append(f"{path}/")
+        else:
+            rows.append(f"{path} {match.group('size')}")
+    if not rows:
+        return result
+    return "path size (dirs end with /)\n" + "\n".join(rows)
+
+
+def _shape_run_output(result, abs_working_directory):
+    match = _RUN_OUTPUT.match(result)
+    if match is None:
+        return result
+    sections = []
+    if match.group("stdout"):
+        sections.append(f"stdout:\n{match.group('stdout').rstrip()}")
+    if match.group("stderr"):
+        sections.append(f"stderr:\n{match.group('stderr').rstrip()}")
+    if match.group("code"):
+        sections.append(f"exit code {match.group('code')}")
+    return "\n".join(sections)
+
+
+_SHAPERS = {
+    "get_files_info": _shape_files_info,
+    "run_python_file": _shape_run_output,
+}